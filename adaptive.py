@@ -0,0 +1,128 @@
+import math
+from typing import Any, Dict, Optional
+
+# metric -> smallest change that counts as movement, so idle noise cannot tighten the interval
+ADAPTIVE_METRICS: Dict[str, float] = {
+    "cpu.id": 5.0,
+    "memory.used": 2.0,
+    "load.min1": 0.5,
+    "diskrw.rate.rkbs": 1024.0,
+    "diskrw.rate.wkbs": 1024.0,
+    "network.rate.rxkbs": 256.0,
+    "network.rate.txkbs": 256.0,
+}
+# metric -> level at or above which the host is sampled at the floor
+ADAPTIVE_THRESHOLDS: Dict[str, float] = {
+    "cpu.us": 80.0,
+    "memory.used": 90.0,
+}
+
+
+class MetricTracker:
+    __slots__ = ("alpha", "mean", "variance", "count")
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, value: float, min_change: float) -> float:
+        # returns how far the value is from the average, in deviations of the metric
+        if self.count == 0:
+            self.mean = value
+            self.count = 1
+            return 0.0
+        diff = value - self.mean
+        score = abs(diff) / max(math.sqrt(self.variance), min_change)
+        increment = self.alpha * diff
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+        self.count += 1
+        return score
+
+
+class AdaptiveInterval:
+    def __init__(self,
+                interval: float,
+                floor: float = 1.0,
+                ceiling: float = 60.0,
+                alpha: float = 0.3,
+                tighten_score: float = 3.0,
+                calm_score: float = 1.0,
+                calm_samples: int = 3,
+                relax_factor: float = 2.0,
+                warmup: int = 3,
+                metrics: Optional[Dict[str, float]] = None,
+                thresholds: Optional[Dict[str, float]] = None):
+        if floor <= 0 or ceiling < floor:
+            raise ValueError("Adaptive interval needs 0 < floor <= ceiling")
+        if calm_score > tighten_score:
+            raise ValueError("calm_score must not exceed tighten_score")
+        self.floor = floor
+        self.ceiling = ceiling
+        self.interval = min(max(interval, floor), ceiling)
+        self.alpha = alpha
+        self.tighten_score = tighten_score
+        self.calm_score = calm_score
+        self.calm_samples = max(1, calm_samples)
+        self.relax_factor = max(relax_factor, 1.0)
+        self.warmup = warmup
+        self.metrics = ADAPTIVE_METRICS if metrics is None else metrics
+        self.thresholds = ADAPTIVE_THRESHOLDS if thresholds is None else thresholds
+        self.trackers: Dict[str, MetricTracker] = {}
+        self.samples = 0
+        self.calm = 0
+        self.tightened = 0
+        self.relaxed = 0
+        self.reason: Optional[str] = None
+
+    def update(self, metrics: Dict[str, float]) -> float:
+        self.samples += 1
+        score = 0.0
+        hot = None
+        for name, min_change in self.metrics.items():
+            value = metrics.get(name)
+            if value is None:
+                continue
+            tracker = self.trackers.get(name)
+            if tracker is None:
+                tracker = self.trackers[name] = MetricTracker(self.alpha)
+            score = max(score, tracker.update(value, min_change))
+        for name, threshold in self.thresholds.items():
+            value = metrics.get(name)
+            if value is not None and value >= threshold:
+                hot = name
+        if self.samples <= self.warmup:
+            return self.interval
+
+        if hot or score >= self.tighten_score:
+            # a spike drops straight to the floor so its shape is captured
+            self.calm = 0
+            self.reason = hot or "volatility"
+            if self.interval > self.floor:
+                self.interval = self.floor
+                self.tightened += 1
+        elif score < self.calm_score:
+            # hysteresis: only a run of calm samples relaxes, one step at a time
+            self.calm += 1
+            if self.calm >= self.calm_samples and self.interval < self.ceiling:
+                self.interval = min(self.interval * self.relax_factor, self.ceiling)
+                self.relaxed += 1
+                self.calm = 0
+                self.reason = None
+        else:
+            # between the two bands the interval holds
+            self.calm = 0
+        return self.interval
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "samples": self.samples,
+            "tightened": self.tightened,
+            "relaxed": self.relaxed,
+            "reason": self.reason
+        }
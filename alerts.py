@@ -0,0 +1,121 @@
+import logging
+import operator
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from history import MetricHistory
+
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+RULE_KINDS = ("threshold", "rate")
+
+
+class AlertRule:
+    def __init__(self,
+                name: str,
+                metric: str,
+                threshold: float,
+                op: str = ">",
+                kind: str = "threshold",
+                duration: float = 0.0,
+                clear_threshold: Optional[float] = None,
+                window: float = 60.0,
+                tags: Optional[List[str]] = None):
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator '{op}', expected one of {list(OPERATORS)}")
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown rule kind '{kind}', expected one of {RULE_KINDS}")
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.op = op
+        self.kind = kind
+        self.duration = duration
+        # hysteresis: a firing rule only resolves once the value is back past this level
+        self.clear_threshold = threshold if clear_threshold is None else clear_threshold
+        self.window = window
+        self.tags = tags or ["health", "alert"]
+        self.state = "ok"
+        self.pending_since: Optional[float] = None
+        self.value: Optional[float] = None
+        self._last_sample: Optional[tuple] = None
+
+    def _rate(self, value: float, now: float, history: Optional[MetricHistory]) -> Optional[float]:
+        if history is not None:
+            samples = history.samples(self.metric, self.window)
+            if len(samples) >= 2 and samples[-1][0] > samples[0][0]:
+                (t0, v0), (t1, v1) = samples[0], samples[-1]
+                return (v1 - v0) / (t1 - t0)
+        previous, self._last_sample = self._last_sample, (now, value)
+        if previous and now > previous[0]:
+            return (value - previous[1]) / (now - previous[0])
+        return None
+
+    def evaluate(self, value: float, now: float, history: Optional[MetricHistory] = None) -> Optional[str]:
+        if self.kind == "rate":
+            value = self._rate(value, now, history)
+            if value is None:
+                return None
+        self.value = value
+        compare = OPERATORS[self.op]
+
+        if self.state == "firing":
+            if not compare(value, self.clear_threshold):
+                self.state = "ok"
+                self.pending_since = None
+                return "resolved"
+            return None
+
+        if not compare(value, self.threshold):
+            self.state = "ok"
+            self.pending_since = None
+            return None
+        if self.pending_since is None:
+            self.pending_since = now
+            self.state = "pending"
+        if now - self.pending_since >= self.duration:
+            self.state = "firing"
+            return "firing"
+        return None
+
+    def message(self, transition: str) -> str:
+        value = f"{self.value:.2f}" if self.value is not None else "n/a"
+        label = f"{self.metric}{'/s' if self.kind == 'rate' else ''}"
+        if transition == "firing":
+            return f"Alert {self.name} firing: {label} {value} {self.op} {self.threshold}"
+        return f"Alert {self.name} resolved: {label} {value}"
+
+
+class AlertEngine:
+    def __init__(self, rules: List[Union[AlertRule, Dict[str, Any]]], history: Optional[MetricHistory] = None):
+        self.rules = [rule if isinstance(rule, AlertRule) else AlertRule(**rule) for rule in rules]
+        self.history = history
+        self.logger = logging.getLogger(__name__)
+
+    def evaluate(self, metrics: Dict[str, float], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        now = now if now is not None else time.time()
+        transitions = []
+        for rule in self.rules:
+            value = metrics.get(rule.metric)
+            if value is None:
+                continue
+            transition = rule.evaluate(value, now, self.history)
+            if transition:
+                transitions.append({
+                    "rule": rule.name,
+                    "state": transition,
+                    "value": rule.value,
+                    "message": rule.message(transition),
+                    "tags": rule.tags + [transition]
+                })
+        return transitions
+
+    def active(self) -> List[str]:
+        return [rule.name for rule in self.rules if rule.state == "firing"]
+
+    def states(self) -> Dict[str, str]:
+        return {rule.name: rule.state for rule in self.rules}
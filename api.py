@@ -1,47 +1,332 @@
+from __future__ import annotations
+
+import copy
+import gzip
+import itertools
 import json
-from typing import Any, Dict, Optional
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
 
 import config
-import requests
+from lazy import LazyModule
+from selfstats import LatencyHistogram
+
+# requests and urllib3 take ~100ms to import; load them with the first client
+requests = LazyModule("requests")
+urllib3 = LazyModule("urllib3")
+
+# status codes a JSON-RPC server answers with when it does not accept batch arrays
+BATCH_REJECT_STATUS = {400, 404, 405, 413, 415, 422, 501}
+COMPRESS_LEVEL = 6
+# params sent in every delta frame so the server can route it
+DELTA_IDENTITY_FIELDS = ("service",)
+# calls that may be repeated after the server could have seen them
+IDEMPOTENT_METHODS = {"service.alerts"}
+# the server turned the call away unprocessed, so any call may be retried
+REJECTED_STATUS = {429, 503}
+RETRY_STATUS = REJECTED_STATUS | {502, 504}
+CIRCUIT_STATES = ("closed", "open", "half_open")
+
+
+def merge_patch(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    # RFC 7386 style: nested dicts are patched recursively, None removes a key
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            nested = merge_patch(old[key], value)
+            if nested:
+                patch[key] = nested
+        elif old[key] != value:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+
+def _not_sent(error: requests.RequestException) -> bool:
+    # the request never reached the server, so retrying cannot duplicate it
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = max(1, threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+                self._probing = False
+            # half open: a single probe decides whether the endpoint is back
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self):
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold):
+                self.state = "open"
+                self.opened += 1
+                self._opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+
+class RPCResult:
+    def __init__(self, status_code: int, data: Dict[str, Any]):
+        self.status_code = status_code
+        self.data = data
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200 and "error" not in self.data
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def json(self) -> Dict[str, Any]:
+        return self.data
 
 
 class HealthAPIClient:
     def __init__(self,
                 rpc_url: str = config.RPC_URL,
                 auth_token: str = config.AUTH_TOKEN,
-                service_id: str = config.SERVICE_ID):
+                service_id: str = config.SERVICE_ID,
+                batch: bool = False,
+                max_pending: int = 100,
+                compress: bool = False,
+                delta: bool = False,
+                keyframe_interval: int = 30,
+                alert_interval: float = 0,
+                notify_on_change: bool = False,
+                session: Optional[requests.Session] = None,
+                connect_timeout: float = 3.05,
+                read_timeout: float = 10.0,
+                pool_size: int = 4,
+                retries: int = 2,
+                backoff: float = 0.25,
+                backoff_max: float = 2.0,
+                breaker_threshold: int = 5,
+                breaker_reset: float = 30.0):
         self.rpc_url = rpc_url
         self.service_id = service_id
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.batch = batch
+        self.batch_supported = True
+        self.pending_notifications = deque(maxlen=max_pending)
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._alert_message: Optional[str] = None
+        self.compress = compress
+        self.delta = delta
+        self.keyframe_interval = max(1, keyframe_interval)
+        self._seq = 0
+        self._acked: Optional[tuple] = None
+        self._frames_since_key = 0
+        self._delta_lock = threading.Lock()
+        self.alert_interval = alert_interval
+        self.notify_on_change = notify_on_change
+        self._last_alert_fetch = 0.0
+        self._last_notified: Optional[str] = None
+        # called with (method, wall seconds, cpu seconds) after every RPC
+        self.observer: Optional[Callable[[str, float, float], None]] = None
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.latency = LatencyHistogram()
+        self._transport = {"requests": 0, "failures": 0, "retries": 0, "timeouts": 0, "short_circuited": 0}
+        self._transport_lock = threading.Lock()
+        # a session passed in may be shared with other clients, so auth goes on each request
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.headers = {
             "token": auth_token,
             "Content-Type": "application/json"
-        })
+        }
+
+    def _count(self, field: str):
+        with self._transport_lock:
+            self._transport[field] += 1
+
+    def _post(self, body: Any) -> requests.Response:
+        calls = body if isinstance(body, list) else [body]
+        idempotent = all(call.get("method") in IDEMPOTENT_METHODS for call in calls)
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError(f"Circuit open for {self.rpc_url}, retry in {self.breaker.retry_in():.1f}s")
+        attempt = 0
+        while True:
+            self._count("requests")
+            error = response = None
+            started = time.perf_counter()
+            try:
+                response = self._timed_post(body)
+            except requests.RequestException as e:
+                error = e
+                if isinstance(e, requests.Timeout):
+                    self._count("timeouts")
+            except BaseException:
+                # not the endpoint's fault (e.g. a payload that cannot be serialised), but a
+                # half-open probe must still be handed back
+                self.breaker.release()
+                raise
+            with self._transport_lock:
+                self.latency.record((time.perf_counter() - started) * 1000)
+
+            if error is None and response.status_code < 500 and response.status_code != 429:
+                self.breaker.record_success()
+                return response
+            self._count("failures")
+            if error is not None:
+                retryable = idempotent or _not_sent(error)
+            else:
+                retryable = response.status_code in (RETRY_STATUS if idempotent else REJECTED_STATUS)
+            if attempt >= self.retries or not retryable:
+                self.breaker.record_failure()
+                if error is not None:
+                    raise error
+                return response
+            # exponential backoff with full jitter
+            time.sleep(random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt)))
+            attempt += 1
+            self._count("retries")
+
+    def _timed_post(self, body: Any) -> requests.Response:
+        if self.observer is None:
+            return self._send_body(body)
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            return self._send_body(body)
+        finally:
+            method = "batch" if isinstance(body, list) else body.get("method", "unknown")
+            self.observer(method, time.perf_counter() - started, time.thread_time() - cpu_started)
+
+    def _send_body(self, body: Any) -> requests.Response:
+        if not self.compress:
+            return self.session.post(self.rpc_url, json=body, headers=self.headers, timeout=self.timeout)
+        data = gzip.compress(json.dumps(body, separators=(',', ':')).encode('utf-8'), compresslevel=COMPRESS_LEVEL)
+        return self.session.post(self.rpc_url, data=data, headers=dict(self.headers, **{"Content-Encoding": "gzip"}),
+                                 timeout=self.timeout)
+
+    def worst_case_request_time(self) -> float:
+        attempts = self.retries + 1
+        backoff = sum(min(self.backoff_max, self.backoff * 2 ** i) for i in range(self.retries))
+        return attempts * sum(self.timeout) + backoff
+
+    def transport_stats(self) -> Dict[str, Any]:
+        with self._transport_lock:
+            stats: Dict[str, Any] = dict(self._transport)
+            stats["latency"] = self.latency.to_dict()
+        stats["circuit"] = {
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "opened": self.breaker.opened,
+            "retry_in": round(self.breaker.retry_in(), 3)
+        }
+        stats["worst_case"] = round(self.worst_case_request_time(), 3)
+        return stats
 
     def make_request(self, payload: Dict[str, Any]) -> Optional[requests.Response]:
         try:
-            response = self.session.post(self.rpc_url, json=payload)
+            response = self._post(payload)
             return response
-        except requests.RequestException:
+        except (requests.RequestException, CircuitOpenError):
             return None
 
-    def send_health_data(self, health_payload: Dict[str, Any]) -> Optional[requests.Response]:
+    def make_batch_request(self, payloads: List[Dict[str, Any]]) -> Optional[List[Optional[RPCResult]]]:
+        calls = []
+        for payload in payloads:
+            call = dict(payload)
+            call.setdefault("id", next(self._ids))
+            calls.append(call)
+        try:
+            response = self._post(calls)
+        except (requests.RequestException, CircuitOpenError):
+            return None
+
+        if response.status_code in BATCH_REJECT_STATUS:
+            self.batch_supported = False
+            return None
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, list):
+            # a single error object (e.g. -32600 invalid request) on a 2xx/4xx reply means batches are
+            # not understood; 5xx and 429 are transient and leave batching on
+            transient = response.status_code >= 500 or response.status_code in REJECTED_STATUS
+            if not transient and isinstance(body, dict) and "error" in body:
+                self.batch_supported = False
+            return None
+
+        by_id = {item.get("id"): item for item in body if isinstance(item, dict)}
+        return [RPCResult(response.status_code, by_id[call["id"]]) if call["id"] in by_id else None
+                for call in calls]
+
+    def _health_payload(self, health_payload: Dict[str, Any]) -> Dict[str, Any]:
         if "params" in health_payload and isinstance(health_payload["params"], dict):
             health_payload["params"]["service"] = self.service_id
-        return self.make_request(health_payload)
+        return health_payload
 
-    def get_alerts(self) -> Optional[requests.Response]:
-        payload = {
+    def _alerts_payload(self) -> Dict[str, Any]:
+        return {
             "jsonrpc": "2.0",
             "method": "service.alerts",
             "params": {
                 "service": self.service_id
             }
         }
-        return self.make_request(payload)
 
-    def send_notification(self, message: str, tags: Optional[list] = None) -> Optional[requests.Response]:
-        payload = {
+    def _notification_payload(self, message: str, tags: Optional[list] = None) -> Dict[str, Any]:
+        return {
             "jsonrpc": "2.0",
             "method": "service.notify",
             "params": {
@@ -50,7 +335,89 @@ class HealthAPIClient:
                 "tags": tags or ["health", "monitoring"]
             }
         }
-        return self.make_request(payload)
+
+    def _encode_health(self, health_payload: Dict[str, Any]):
+        params = health_payload.get("params")
+        if not self.delta or not isinstance(params, dict):
+            return health_payload, None
+        snapshot = copy.deepcopy({k: v for k, v in params.items() if k != "logs"})
+        with self._delta_lock:
+            self._seq += 1
+            seq = self._seq
+            if self._acked is None or self._frames_since_key >= self.keyframe_interval:
+                wire_params = dict(params)
+                wire_params["delta"] = {"seq": seq, "base": None}
+                self._frames_since_key = 0
+            else:
+                base_seq, base = self._acked
+                wire_params = merge_patch(base, snapshot)
+                for field in DELTA_IDENTITY_FIELDS:
+                    if field in params:
+                        wire_params[field] = params[field]
+                wire_params["logs"] = params.get("logs", [])
+                wire_params["delta"] = {"seq": seq, "base": base_seq}
+                self._frames_since_key += 1
+        wire = dict(health_payload)
+        wire["params"] = wire_params
+        return wire, (seq, snapshot)
+
+    def _acknowledge(self, frame: Optional[tuple], response: Any):
+        if frame is None:
+            return
+        with self._delta_lock:
+            if response:
+                if self._acked is None or frame[0] > self._acked[0]:
+                    self._acked = frame
+            elif response is not None:
+                # the server answered but did not take the frame; resync with a keyframe
+                self._acked = None
+
+    def send_health_data(self, health_payload: Dict[str, Any]) -> Optional[requests.Response]:
+        wire, frame = self._encode_health(self._health_payload(health_payload))
+        response = self.make_request(wire)
+        self._acknowledge(frame, response)
+        return response
+
+    def get_alerts(self) -> Optional[requests.Response]:
+        return self.make_request(self._alerts_payload())
+
+    def send_notification(self, message: str, tags: Optional[list] = None) -> Optional[requests.Response]:
+        return self.make_request(self._notification_payload(message, tags))
+
+    def send_health_batch(self, health_payloads: List[Dict[str, Any]], keep_service: bool = False) -> int:
+        # keep_service leaves params.service as is, for payloads relayed on behalf of other agents
+        payloads = health_payloads if keep_service else [self._health_payload(p) for p in health_payloads]
+        if self.batch and self.batch_supported:
+            results = self.make_batch_request(payloads)
+            if results is not None:
+                delivered = 0
+                for result in results:
+                    if not result:
+                        break
+                    delivered += 1
+                return delivered
+            if self.batch_supported:
+                return 0
+        delivered = 0
+        for payload in payloads:
+            if not self.make_request(payload):
+                break
+            delivered += 1
+        return delivered
+
+    def enqueue_notification(self, message: str, tags: Optional[list] = None):
+        with self._pending_lock:
+            self.pending_notifications.append(self._notification_payload(message, tags))
+
+    def _drain_notifications(self) -> List[Dict[str, Any]]:
+        with self._pending_lock:
+            pending = list(self.pending_notifications)
+            self.pending_notifications.clear()
+        return pending
+
+    def _requeue_notifications(self, pending: List[Dict[str, Any]]):
+        with self._pending_lock:
+            self.pending_notifications.extendleft(reversed(pending))
 
     def process_alerts(self, alert_response: Optional[requests.Response]) -> str:
         try:
@@ -65,12 +432,70 @@ class HealthAPIClient:
             return "Alert status unknown"
 
     def health_check_cycle(self, health_data: Dict[str, Any]) -> Dict[str, Optional[requests.Response]]:
+        if self.batch and self.batch_supported:
+            return self._batched_cycle(health_data)
+        return self._sequential_cycle(health_data)
+
+    def _alerts_due(self) -> bool:
+        return self.alert_interval <= 0 or time.monotonic() - self._last_alert_fetch >= self.alert_interval
+
+    def _should_notify(self, message: str) -> bool:
+        return not self.notify_on_change or message != self._last_notified
+
+    def _sequential_cycle(self, health_data: Dict[str, Any]) -> Dict[str, Optional[requests.Response]]:
         health_response = self.send_health_data(health_data)
-        alert_response = self.get_alerts()
-        message = self.process_alerts(alert_response)
-        notify_response = self.send_notification(message)
+        alert_response = notify_response = None
+        if self._alerts_due():
+            self._last_alert_fetch = time.monotonic()
+            alert_response = self.get_alerts()
+            message = self.process_alerts(alert_response)
+            if self._should_notify(message):
+                notify_response = self.send_notification(message)
+                if notify_response:
+                    self._last_notified = message
+        pending = self._drain_notifications()
+        for i, notification in enumerate(pending):
+            if not self.make_request(notification):
+                self._requeue_notifications(pending[i:])
+                break
         return {
             "health_response": health_response,
             "alert_response": alert_response,
             "notify_response": notify_response
+        }
+
+    def _batched_cycle(self, health_data: Dict[str, Any]) -> Dict[str, Optional[requests.Response]]:
+        # the alert status of this cycle is only known once the batch returns,
+        # so the notification carries the status from the previous fetch
+        health_call, frame = self._encode_health(self._health_payload(health_data))
+        calls = [health_call]
+        alerts_index = notify_index = None
+        if self._alerts_due():
+            self._last_alert_fetch = time.monotonic()
+            alerts_index = len(calls)
+            calls.append(self._alerts_payload())
+        message, self._alert_message = self._alert_message, None
+        if message is not None and self._should_notify(message):
+            notify_index = len(calls)
+            calls.append(self._notification_payload(message))
+        pending = self._drain_notifications()
+        calls.extend(pending)
+
+        results = self.make_batch_request(calls)
+        if results is None:
+            self._requeue_notifications(pending)
+            self._alert_message = message
+            if not self.batch_supported:
+                return self._sequential_cycle(health_data)
+            results = [None] * len(calls)
+
+        self._acknowledge(frame, results[0])
+        if alerts_index is not None:
+            self._alert_message = self.process_alerts(results[alerts_index])
+        if notify_index is not None and results[notify_index]:
+            self._last_notified = message
+        return {
+            "health_response": results[0],
+            "alert_response": results[alerts_index] if alerts_index is not None else None,
+            "notify_response": results[notify_index] if notify_index is not None else None
         }
\ No newline at end of file
@@ -0,0 +1,424 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import psutil
+
+import logs
+from adaptive import AdaptiveInterval
+from api import HealthAPIClient
+from collectors import HostCollectors
+from history import percentile
+from metadata import BuildMetadata
+from monitor import HealthMonitor
+from relay import RelayClient, RelayServer
+from stubrpc import StubRPCServer
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(ROOT, "bench_baseline.json")
+# timings this small are mostly scheduler and cache noise; a regression has to exceed this as well
+NOISE_FLOOR_MS = 0.05
+STARTUP_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+started = time.perf_counter()
+import monitor
+imported = time.perf_counter()
+health = monitor.HealthMonitor(lazy=sys.argv[2].startswith("lazy"), procfs=sys.argv[2].endswith("procfs"))
+constructed = time.perf_counter()
+constructed_psutil = "psutil" in sys.modules
+health.get_system_health()
+sampled = time.perf_counter()
+print(json.dumps({"import": imported - started, "construct": constructed - imported,
+                  "first_sample": sampled - constructed, "total": sampled - started,
+                  "requests": "requests" in sys.modules, "psutil_at_construct": constructed_psutil,
+                  "psutil": "psutil" in sys.modules}))
+"""
+
+
+def _timings(func: Callable[[], Any], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+        "max_ms": round(max(samples), 4)
+    }
+
+
+def bench_collectors(monitor: HealthMonitor, iterations: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    # metadata is read from this checkout, wherever the benchmark is started from
+    host = HostCollectors(BuildMetadata(path=ROOT))
+    try:
+        for name in host.registry.names():
+            results[name] = _summary(_timings(host.registry.get(name).func, iterations))
+        # back to back, the cpu collector only repeats its last values inside the minimum window
+        results["cpu"] = _summary(_timings(host.cpu_sampler.cpu_times, iterations))
+    finally:
+        host.close()
+    # the full capture reuses cached values for collectors that are not due
+    results["get_system_health"] = _summary(_timings(monitor.get_system_health, iterations))
+    return results
+
+
+def bench_procfs(iterations: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    metadata = BuildMetadata()
+    results = {}
+    for mode, procfs in (("psutil", False), ("procfs", True)):
+        host = HostCollectors(metadata, procfs=procfs)
+        if procfs and host.procfs is None:
+            host.close()
+            continue
+        try:
+            host.collect()
+            results[mode] = {name: _summary(_timings(host.registry.get(name).func, iterations))
+                             for name in ("memory", "diskrw", "network")}
+            # the cpu collector repeats its last values inside the minimum window, so time the read itself
+            results[mode]["cpu"] = _summary(_timings(host.cpu_sampler.cpu_times, iterations))
+        finally:
+            host.close()
+    return results
+
+
+def bench_logs(records: int) -> Dict[str, float]:
+    logs.install()
+    bench_logger = logging.getLogger("MonitorLogger.bench")
+    # measure the collector alone, not the console/file handlers on the root logger
+    propagate, logs.logger.propagate = logs.logger.propagate, False
+    try:
+        started = time.perf_counter()
+        for i in range(records):
+            bench_logger.info(f"benchmark record {i} " + "x" * 64)
+        emitted = time.perf_counter() - started
+    finally:
+        logs.logger.propagate = propagate
+    started = time.perf_counter()
+    flushed = logs.flush_logs()
+    flush_ms = (time.perf_counter() - started) * 1000
+    # drain whatever the byte budget left behind
+    while logs.flush_logs():
+        pass
+    return {
+        "emit_us": round(emitted / records * 1e6, 3),
+        "flush_ms": round(flush_ms, 4),
+        "flushed": len(flushed),
+        "flush_bytes": len(json.dumps(flushed))
+    }
+
+
+def bench_startup(runs: int) -> Dict[str, Any]:
+    # fresh interpreters in an empty directory, so the timings include every import
+    # and anything written to the working directory shows up as a side effect
+    env = dict(os.environ)
+    # the warm-up run leaves bytecode behind for the measured ones
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    results: Dict[str, Any] = {}
+    for mode in ("lazy", "lazy_procfs", "eager"):
+        samples: Dict[str, List[float]] = {}
+        with tempfile.TemporaryDirectory() as cwd:
+            for i in range(runs + 1):
+                output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, ROOT, mode], cwd=cwd, env=env,
+                                        capture_output=True, text=True, check=True).stdout
+                timings = json.loads(output.strip().splitlines()[-1])
+                imported = {name: int(timings.pop(name)) for name in ("requests", "psutil_at_construct", "psutil")}
+                if i == 0:
+                    continue
+                for name, seconds in timings.items():
+                    samples.setdefault(name, []).append(seconds * 1000)
+            files = os.listdir(cwd)
+        results[mode] = {name: _summary(values) for name, values in samples.items()}
+        results[mode]["files_created"] = len(files)
+        results[mode]["imported"] = imported
+    return results
+
+
+def bench_payload(monitor: HealthMonitor) -> Dict[str, int]:
+    payload = monitor.get_system_health()
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    client = HealthAPIClient(delta=True)
+    client._acknowledge(client._encode_health(json.loads(body))[1], True)
+    delta, _ = client._encode_health(monitor.get_system_health())
+    delta_body = json.dumps(delta, separators=(',', ':')).encode('utf-8')
+    return {
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body)),
+        "delta_bytes": len(delta_body),
+        "delta_gzip_bytes": len(gzip.compress(delta_body))
+    }
+
+
+def bench_cycle(monitor: HealthMonitor, iterations: int, latency: float, error_rate: float) -> Dict[str, Dict[str, float]]:
+    server = StubRPCServer(latency=latency, error_rate=error_rate).start()
+    results = {}
+    try:
+        for mode, options in (("sequential", {}), ("batch", {"batch": True}), ("batch_gzip_delta", {"batch": True, "compress": True, "delta": True})):
+            client = HealthAPIClient(rpc_url=server.url, **options)
+            server.requests.clear()
+            server.bytes_received = 0
+            samples = _timings(lambda: client.health_check_cycle(monitor.get_system_health()), iterations)
+            results[mode] = dict(_summary(samples),
+                                 requests_per_cycle=round(len(server.requests) / iterations, 2),
+                                 bytes_per_cycle=server.bytes_received // iterations)
+    finally:
+        server.stop()
+    return results
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def bench_relay(monitor: HealthMonitor, agents: int = 3, rounds: int = 5) -> Dict[str, Any]:
+    # agents -> unix socket -> relay -> stub; returns the counts plus whatever did not add up
+    server = StubRPCServer().start()
+    errors: List[str] = []
+    results: Dict[str, Any] = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # only full batches wake the flush, so each round goes upstream as one batch
+            relay = RelayServer(HealthAPIClient(rpc_url=server.url, batch=True), unix_path=os.path.join(tmp, "relay.sock"),
+                                batch_size=agents, flush_interval=30).start()
+            clients = [RelayClient(unix_path=relay.unix_path, service_id=f"bench-agent-{i}") for i in range(agents)]
+            try:
+                started = time.perf_counter()
+                for _ in range(rounds):
+                    for client in clients:
+                        if not client.send_health_data(monitor.get_system_health()):
+                            errors.append(f"{client.service_id} payload not acknowledged")
+                    sent = relay.stats()["received"]
+                    if not _wait_for(lambda: relay.stats()["forwarded"] == sent):
+                        errors.append(f"relay forwarded {relay.stats()['forwarded']} of {sent}")
+                elapsed = time.perf_counter() - started
+                calls = server.calls()
+                services = {}
+                for call in calls:
+                    service = call.get("params", {}).get("service")
+                    services[service] = services.get(service, 0) + 1
+                results["delivery"] = dict(relay.stats(), upstream_requests=len(server.requests), upstream_calls=len(calls),
+                                           payload_ms=round(elapsed / (agents * rounds) * 1000, 4))
+                if len(server.requests) != rounds or len(calls) != agents * rounds:
+                    errors.append(f"{len(calls)} calls in {len(server.requests)} upstream requests, "
+                                  f"expected {agents * rounds} in {rounds}")
+                if services != {client.service_id: rounds for client in clients}:
+                    errors.append(f"payloads lost their agent's service id: {services}")
+            finally:
+                for client in clients:
+                    client.close()
+                relay.stop()
+
+            # a full relay answers ok=false with retry_after, and the agent backs off without sending
+            server.requests.clear()
+            relay = RelayServer(HealthAPIClient(rpc_url=server.url, batch=True), unix_path=os.path.join(tmp, "relay.sock"),
+                                batch_size=10, flush_interval=30, max_pending=2).start()
+            client = RelayClient(unix_path=relay.unix_path, service_id="bench-agent-0")
+            try:
+                acks = [client.send_health_data(monitor.get_system_health()) for _ in range(3)]
+                rejected = acks[-1]
+                if [bool(ack) for ack in acks] != [True, True, False]:
+                    errors.append(f"acks {[ack and ack.status_code for ack in acks]}, expected the third to be refused")
+                elif rejected.status_code != 503 or rejected.retry_after != relay.flush_interval:
+                    errors.append(f"refusal was {rejected.status_code} with retry_after {rejected.retry_after}")
+                backoff = client.send_health_data(monitor.get_system_health())
+                if backoff is None or backoff.ok or relay.stats()["rejected"] != 1:
+                    errors.append("agent sent again before retry_after elapsed")
+            finally:
+                client.close()
+                relay.stop()
+            results["backpressure"] = dict(relay.stats(), upstream_calls=len(server.calls()))
+            if relay.stats()["forwarded"] != 2 or len(server.calls()) != 2:
+                errors.append("the accepted payloads were not forwarded on stop")
+    finally:
+        server.stop()
+    results["errors"] = errors
+    return results
+
+
+def _host_trace(duration: int, spikes: int, spike_length: int, seed: int = 7):
+    # one sample per second: a quiet host with a few short cpu spikes
+    rng = random.Random(seed)
+    starts = sorted(rng.sample(range(60, duration - spike_length), spikes))
+    busy = set()
+    for start in starts:
+        busy.update(range(start, start + spike_length))
+    trace: List[Dict[str, float]] = []
+    for second in range(duration):
+        us = rng.uniform(85, 95) if second in busy else rng.gauss(5, 1)
+        trace.append({"cpu.us": us, "cpu.id": 100 - us - 2, "memory.used": rng.gauss(40, 0.3),
+                      "load.min1": 0.3 + us / 50})
+    return trace, [range(start, start + spike_length) for start in starts]
+
+
+def bench_adaptive(duration: int = 3600, spikes: int = 6, spike_length: int = 15) -> Dict[str, Dict[str, float]]:
+    # compares sample volume and how much of each spike is seen against fixed intervals
+    trace, spans = _host_trace(duration, spikes, spike_length)
+    spike_seconds = sum(len(span) for span in spans)
+    policies: Dict[str, Callable[[], Callable[[Dict[str, float]], float]]] = {
+        "fixed_1s": lambda: lambda sample: 1,
+        "fixed_10s": lambda: lambda sample: 10,
+        "adaptive_10s": lambda: AdaptiveInterval(10, floor=1, ceiling=10).update,
+        "adaptive_30s": lambda: AdaptiveInterval(10, floor=1, ceiling=30).update
+    }
+    results = {}
+    for name, policy in policies.items():
+        update = policy()
+        sampled = set()
+        t = 0.0
+        while t < duration:
+            second = int(t)
+            sampled.add(second)
+            t += update(trace[second])
+        seen = [sum(1 for second in span if second in sampled) for span in spans]
+        results[name] = {
+            "samples": len(sampled),
+            "spikes_seen": sum(1 for count in seen if count),
+            "spike_coverage": round(sum(seen) / spike_seconds, 3)
+        }
+    return results
+
+
+def bench_agent(duration: float, interval: float) -> Dict[str, float]:
+    server = StubRPCServer().start()
+    process = psutil.Process()
+    try:
+        monitor = HealthMonitor()
+        monitor.set_api_client(HealthAPIClient(rpc_url=server.url))
+        cpu_before = sum(process.cpu_times()[:2])
+        started = time.monotonic()
+        monitor.start(interval=interval)
+        time.sleep(duration)
+        monitor.stop()
+        wall = time.monotonic() - started
+        cpu = sum(process.cpu_times()[:2]) - cpu_before
+    finally:
+        server.stop()
+    return {
+        "cpu_percent": round(cpu / wall * 100, 2),
+        "rss_mb": round(process.memory_info().rss / (1024 * 1024), 2),
+        "captures": monitor.capture_count
+    }
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, Any], settings: Dict[str, float]) -> List[str]:
+    tolerance = baseline.get("tolerance", 1.0)
+    noise_floor = baseline.get("noise_floor_ms", NOISE_FLOOR_MS)
+    # cycle timings are only comparable under the same injected latency and errors
+    same_settings = baseline.get("settings", settings) == settings
+    failures = []
+    for name, limit in baseline.get("metrics", {}).items():
+        value = results.get(name)
+        if value is None or (name.startswith("cycle.") and not same_settings):
+            continue
+        allowed = limit * (1 + tolerance)
+        if name.endswith("_ms"):
+            allowed = max(allowed, limit + noise_floor)
+        if value > allowed:
+            failures.append(f"{name}: {value} exceeds baseline {limit} (+{tolerance:.0%} = {allowed:.4g})")
+    return failures
+
+
+def run(args) -> Dict[str, Any]:
+    monitor = HealthMonitor()
+    monitor.set_api_client(None)
+    monitor.get_system_health()
+    return {
+        "startup": bench_startup(args.startup_runs),
+        "collectors": bench_collectors(monitor, args.iterations),
+        "procfs": bench_procfs(args.iterations),
+        "logs": bench_logs(args.log_records),
+        "payload": bench_payload(monitor),
+        "adaptive": bench_adaptive(),
+        "cycle": bench_cycle(monitor, max(1, args.iterations // 10), args.latency, args.error_rate),
+        "relay": bench_relay(monitor),
+        "agent": bench_agent(args.duration, args.interval)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the health monitor agent")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--startup-runs", type=int, default=10, help="fresh interpreters to time per startup mode")
+    parser.add_argument("--log-records", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub RPC server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub RPC requests that fail")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds to run the agent loop")
+    parser.add_argument("--interval", type=float, default=0.25, help="agent loop interval in seconds")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=None, help="allowed regression over baseline (0.5 = +50%%)")
+    args = parser.parse_args(argv)
+
+    # keeps the monitors from configuring their own console and file logging
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    flat = flatten(results)
+
+    settings = {"latency": args.latency, "error_rate": args.error_rate}
+    # a relay that drops or misroutes payloads is a failure whatever the timings say
+    broken = [f"relay: {error}" for error in results["relay"]["errors"]]
+    for error in broken:
+        print(f"FAILED {error}")
+
+    if args.update_baseline:
+        if broken:
+            return 1
+        # max/p99 of a few hundred samples are too noisy to gate on; startup and cycle only take a few dozen
+        # samples, so their p95 is the max too
+        metrics = {k: v for k, v in flat.items() if k.endswith(("p50_ms", "p95_ms", "_us", "bytes", "cpu_percent", "rss_mb"))
+                   and not (k.startswith(("startup.", "cycle.")) and k.endswith("p95_ms"))}
+        with open(args.baseline, 'w') as f:
+            json.dump({"tolerance": args.tolerance if args.tolerance is not None else 1.0,
+                       "noise_floor_ms": NOISE_FLOOR_MS, "settings": settings, "metrics": metrics},
+                      f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        print("No baseline found; run with --update-baseline to record one")
+        return 1 if broken else 0
+    if args.tolerance is not None:
+        baseline["tolerance"] = args.tolerance
+    failures = compare(flat, baseline, settings)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures or broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
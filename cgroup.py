@@ -0,0 +1,207 @@
+import os
+import time
+from typing import Any, Dict, Optional
+
+from collectors import CounterRates, _rate_dict
+from lazy import LazyModule
+from procfs import ProcFile
+
+psutil = LazyModule("psutil")
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+CGROUP_MODES = ("off", "alongside", "instead")
+CGROUP_FILES = ("cpu.max", "cpu.stat", "cpuset.cpus.effective", "memory.current", "memory.max",
+                "memory.stat", "io.stat", "cpu.pressure", "memory.pressure", "io.pressure")
+CPU_STAT_FIELDS = (b"usage_usec", b"user_usec", b"system_usec", b"nr_periods", b"nr_throttled", b"throttled_usec")
+IO_STAT_FIELDS = (b"rios", b"wios", b"rbytes", b"wbytes")
+IO_RATE_FIELDS = ("riops", "wiops", "rkbs", "wkbs")
+
+
+def find_cgroup(root: str = CGROUP_ROOT) -> Optional[str]:
+    # only the unified (v2) hierarchy is supported; its entry in /proc/self/cgroup is "0::<path>"
+    relative = None
+    try:
+        with open("/proc/self/cgroup", "r") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    relative = line[3:].strip()
+                    break
+    except OSError:
+        return None
+    if relative is None:
+        return None
+    for path in (os.path.normpath(os.path.join(root, relative.lstrip("/"))), root):
+        # inside a cgroup namespace the group is mounted at the root
+        if os.path.exists(os.path.join(path, "cgroup.controllers")):
+            return path
+    return None
+
+
+def _count_cpus(cpuset: bytes) -> int:
+    count = 0
+    for part in cpuset.strip().split(b","):
+        if not part:
+            continue
+        start, _, end = part.partition(b"-")
+        count += int(end) - int(start) + 1 if end else 1
+    return count
+
+
+def _pressure(data: bytes) -> Dict[str, float]:
+    pressure = {}
+    for line in data.split(b"\n"):
+        fields = line.split()
+        if not fields:
+            continue
+        kind = fields[0].decode()
+        for field in fields[1:3]:
+            key, _, value = field.partition(b"=")
+            # avg10 / avg60 as some10, some60, full10, full60
+            pressure[f"{kind}{key[3:].decode()}"] = float(value)
+    return pressure
+
+
+class CgroupCollector:
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, ProcFile] = {}
+        for name in CGROUP_FILES:
+            try:
+                self.files[name] = ProcFile(os.path.join(path, name), size=4096)
+            except OSError:
+                pass
+        self.host_memory = psutil.virtual_memory().total
+        self.host_cpus = psutil.cpu_count() or 1
+        self.cpu_rates = CounterRates()
+        self.io_rates = CounterRates()
+
+    def _read(self, name: str) -> Optional[bytes]:
+        f = self.files.get(name)
+        if f is None:
+            return None
+        try:
+            return f.read()
+        except OSError:
+            return None
+
+    def cpu_limit(self) -> float:
+        limit = float(self.host_cpus)
+        cpuset = self._read("cpuset.cpus.effective")
+        if cpuset and cpuset.strip():
+            limit = float(_count_cpus(cpuset))
+        data = self._read("cpu.max")
+        fields = data.split() if data else []
+        if fields and fields[0] != b"max":
+            period = int(fields[1]) if len(fields) > 1 else 100000
+            # a quota above the cpuset size cannot be used
+            limit = min(limit, int(fields[0]) / period)
+        return limit
+
+    def memory(self) -> Dict[str, Any]:
+        current = self._read("memory.current")
+        limit = self._read("memory.max")
+        current = int(current) if current else 0
+        # like the container runtimes, count inactive page cache as reclaimable
+        inactive = 0
+        for line in (self._read("memory.stat") or b"").split(b"\n"):
+            if line.startswith(b"inactive_file "):
+                inactive = int(line.split()[1])
+                break
+        working_set = max(current - inactive, 0)
+        limited = bool(limit) and limit.strip() != b"max"
+        total = int(limit) if limited else self.host_memory
+        return {
+            "total": total // (1024 * 1024),
+            "current": working_set // (1024 * 1024),
+            "used": round(working_set * 100.0 / total, 1) if total else 0.0,
+            "limited": limited
+        }
+
+    def cpu(self, now: float) -> Dict[str, Any]:
+        limit = self.cpu_limit()
+        cpu: Dict[str, Any] = {"limit": round(limit, 2), "used": 0.0, "usage": 0.0, "us": 0.0, "sy": 0.0,
+                               "throttled": 0.0, "throttled_ms": 0.0}
+        data = self._read("cpu.stat")
+        if not data:
+            return cpu
+        stat = {}
+        for line in data.split(b"\n"):
+            key, _, value = line.partition(b" ")
+            if key in CPU_STAT_FIELDS:
+                stat[key] = int(value)
+        counters = tuple(stat.get(field, 0) for field in CPU_STAT_FIELDS)
+        rates = self.cpu_rates.update({"cpu": counters}, now).get("cpu")
+        if rates is None:
+            return cpu
+        usage, user, system, periods, throttled, throttled_usec = rates
+        # usec of cpu time per second of wall time is cores in use
+        cpu["used"] = round(usage / 1e6, 3)
+        cpu["usage"] = round(min(usage / 1e6 / limit * 100, 100.0), 1) if limit else 0.0
+        cpu["us"] = round(min(user / 1e6 / limit * 100, 100.0), 1) if limit else 0.0
+        cpu["sy"] = round(min(system / 1e6 / limit * 100, 100.0), 1) if limit else 0.0
+        cpu["throttled"] = round(throttled * 100.0 / periods, 1) if periods else 0.0
+        cpu["throttled_ms"] = round(throttled_usec / 1000, 2)
+        return cpu
+
+    def io(self, now: float) -> Dict[str, float]:
+        data = self._read("io.stat")
+        counters = {}
+        for line in (data or b"").split(b"\n"):
+            fields = line.split()
+            if not fields:
+                continue
+            values = dict(field.partition(b"=")[::2] for field in fields[1:])
+            counters[fields[0].decode()] = tuple(int(values.get(field, 0)) for field in IO_STAT_FIELDS)
+        totals = [0.0] * len(IO_RATE_FIELDS)
+        for rios, wios, rbytes, wbytes in self.io_rates.update(counters, now).values():
+            for i, value in enumerate((rios, wios, rbytes / 1024, wbytes / 1024)):
+                totals[i] += value
+        return _rate_dict(IO_RATE_FIELDS, totals)
+
+    def pressure(self) -> Dict[str, Dict[str, float]]:
+        pressure = {}
+        for resource in ("cpu", "memory", "io"):
+            data = self._read(f"{resource}.pressure")
+            if data:
+                pressure[resource] = _pressure(data)
+        return pressure
+
+    def collect(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "cpu": self.cpu(now),
+            "memory": self.memory(),
+            "io": self.io(now),
+            "pressure": self.pressure()
+        }
+
+    def close(self):
+        files, self.files = self.files, {}
+        for f in files.values():
+            f.close()
+
+
+def open_cgroup(root: str = CGROUP_ROOT) -> Optional[CgroupCollector]:
+    path = find_cgroup(root)
+    if path is None:
+        return None
+    collector = CgroupCollector(path)
+    if "cpu.stat" not in collector.files and "memory.current" not in collector.files:
+        collector.close()
+        return None
+    return collector
+
+
+def apply_cgroup(section: Dict[str, Any], cgroup: Dict[str, Any], mode: str):
+    # section is the payload's "cpu" dict; the collector values in it are shared, so replace, never mutate
+    if not cgroup or mode == "off":
+        return
+    section["cgroup"] = cgroup
+    if mode != "instead":
+        return
+    cpu, memory = cgroup["cpu"], cgroup["memory"]
+    limit = cpu["limit"]
+    section["core"] = int(limit) if float(limit).is_integer() else limit
+    section["memory"] = {"total": memory["total"], "used": round(memory["used"])}
+    us, sy = round(cpu["us"]), round(cpu["sy"])
+    section["cpu"] = {"sy": sy, "wa": 0, "id": max(0, 100 - us - sy), "us": us}
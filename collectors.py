@@ -0,0 +1,617 @@
+import fnmatch
+import heapq
+import os
+import select
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from lazy import LazyModule
+from procfs import disk_usage, open_procfs
+
+psutil = LazyModule("psutil")
+# the same test as psutil.LINUX; the procfs path never imports psutil
+LINUX = sys.platform.startswith("linux")
+
+# cpu percentages need at least this much wall time (10 clock ticks at 100 Hz) between snapshots
+MIN_CPU_WINDOW = 0.1
+IDLE_CPU: Dict[str, int] = {"sy": 0, "wa": 0, "id": 100, "us": 0}
+
+# seconds between refreshes; 0 means every capture
+DEFAULT_INTERVALS: Dict[str, float] = {
+    "cpu": 0,
+    "memory": 0,
+    "load": 0,
+    "diskrw": 0,
+    "network": 0,
+    "diskinfo": 60,
+    "metadata": 300,
+    "processes": 5,
+    "cgroup": 0,
+}
+
+
+def _cpu_total(times) -> float:
+    total = sum(times)
+    if LINUX:
+        # guest time is already accounted for in user/nice on Linux
+        total -= getattr(times, 'guest', 0) + getattr(times, 'guest_nice', 0)
+    return total
+
+
+def _cpu_breakdown(prev, cur) -> Optional[Dict[str, int]]:
+    # without a previous snapshot the breakdown covers everything since boot
+    total = _cpu_total(cur) - (_cpu_total(prev) if prev is not None else 0)
+    if total <= 0:
+        return None
+
+    def pct(field: str, default: float = 0) -> int:
+        if not hasattr(cur, field):
+            return default
+        delta = max(getattr(cur, field) - (getattr(prev, field) if prev is not None else 0), 0)
+        return round(min(delta * 100.0 / total, 100.0))
+
+    return {"sy": pct('system'), "wa": pct('iowait'), "id": pct('idle', 100), "us": pct('user')}
+
+
+class CpuSampler:
+    def __init__(self,
+                per_core: bool = False,
+                cpu_times: Optional[Callable[..., Any]] = None,
+                min_window: float = MIN_CPU_WINDOW,
+                clock: Callable[[], float] = time.monotonic):
+        self.per_core = per_core
+        self.cpu_times = cpu_times or psutil.cpu_times
+        self.min_window = min_window
+        self.clock = clock
+        self._prev_total = None
+        self._prev_cores: List[Any] = []
+        self._prev_time: Optional[float] = None
+        self._last_stats: Optional[Dict[str, int]] = None
+        self._last_cores: List[Dict[str, int]] = []
+
+    def prime(self):
+        try:
+            self._prev_total = self.cpu_times()
+            if self.per_core:
+                self._prev_cores = self.cpu_times(percpu=True)
+            self._prev_time = self.clock()
+        except Exception:
+            self._prev_total = None
+            self._prev_cores = []
+            self._prev_time = None
+
+    def sample(self) -> Dict[str, Any]:
+        now = self.clock()
+        # shorter windows are a handful of clock ticks; keep the baseline and repeat the last values.
+        # the first capture has no baseline and reports the since-boot averages instead of waiting
+        if self._prev_time is None or now - self._prev_time >= self.min_window:
+            current = self.cpu_times()
+            stats = _cpu_breakdown(self._prev_total, current)
+            if stats is not None:
+                self._last_stats = stats
+            self._prev_total = current
+            if self.per_core:
+                self._sample_cores()
+            self._prev_time = now
+
+        stats = dict(self._last_stats or IDLE_CPU)
+        if self.per_core:
+            stats["cores"] = list(self._last_cores)
+        return stats
+
+    def _sample_cores(self):
+        current = self.cpu_times(percpu=True)
+        if not self._prev_cores:
+            self._prev_cores = [None] * len(current)
+        elif len(current) != len(self._prev_cores):
+            # cores went on/offline; start a fresh baseline
+            self._prev_cores = current
+            self._last_cores = [dict(self._last_stats or IDLE_CPU) for _ in current]
+            return
+
+        cores = []
+        for i, (prev, cur) in enumerate(zip(self._prev_cores, current)):
+            stats = _cpu_breakdown(prev, cur)
+            if stats is None:
+                stats = self._last_cores[i] if i < len(self._last_cores) else dict(IDLE_CPU)
+            cores.append(stats)
+        self._prev_cores = current
+        self._last_cores = cores
+
+
+class ProcessCollector:
+    ATTRS = ['name', 'create_time', 'cpu_times', 'memory_info', 'io_counters']
+
+    def __init__(self, top_n: int = 5):
+        self.top_n = top_n
+        # pid -> (create_time, Process, cpu seconds, io bytes)
+        self._procs: Dict[int, tuple] = {}
+        self._last_sample: Optional[float] = None
+
+    def sample(self) -> Dict[str, List[Dict[str, Any]]]:
+        now = time.monotonic()
+        elapsed = now - self._last_sample if self._last_sample else 0.0
+        self._last_sample = now
+        procs: Dict[int, tuple] = {}
+        rows = []
+        for proc in psutil.process_iter(self.ATTRS, ad_value=None):
+            info = proc.info
+            create_time = info.get('create_time')
+            cpu_times = info.get('cpu_times')
+            mem = info.get('memory_info')
+            io = info.get('io_counters')
+            cpu_total = cpu_times.user + cpu_times.system if cpu_times else 0.0
+            io_total = io.read_bytes + io.write_bytes if io else 0
+
+            cpu = io_rate = 0.0
+            prev = self._procs.get(proc.pid)
+            # a pid reused by a new process has a different create time; start it fresh
+            if prev and prev[0] == create_time and elapsed > 0:
+                cpu = max(cpu_total - prev[2], 0.0) * 100.0 / elapsed
+                io_rate = max(io_total - prev[3], 0) / elapsed
+            procs[proc.pid] = (create_time, proc, cpu_total, io_total)
+            rows.append((cpu, mem.rss if mem else 0, io_rate, proc.pid, info.get('name') or ""))
+
+        # pids that were not seen in this pass are gone
+        self._procs = procs
+        return {
+            "cpu": self._top(rows, 0),
+            "rss": self._top(rows, 1),
+            "io": self._top(rows, 2)
+        }
+
+    def _top(self, rows: List[tuple], key: int) -> List[Dict[str, Any]]:
+        return [{"pid": pid, "name": name, "cpu": round(cpu, 1), "rss": rss // 1024, "io": round(io_rate / 1024, 1)}
+                for cpu, rss, io_rate, pid, name in heapq.nlargest(self.top_n, rows, key=lambda row: row[key])]
+
+
+class Collector:
+    def __init__(self,
+                name: str,
+                func: Callable[[], Any],
+                interval: float = 0,
+                cost: str = "low",
+                default: Any = None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cost = cost
+        self.default = default
+        self.value = default
+        self.last_run: Optional[float] = None
+        self.last_duration = 0.0
+        self.last_cpu = 0.0
+        self.runs = 0
+        self.errors = 0
+
+    def is_due(self, now: float) -> bool:
+        return self.last_run is None or now - self.last_run >= self.interval
+
+    def collect(self, now: float) -> Any:
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            self.value = self.func()
+            self.last_run = now
+            self.runs += 1
+        except Exception:
+            # keep the previous value and retry on the next capture
+            self.errors += 1
+        finally:
+            self.last_duration = time.perf_counter() - started
+            self.last_cpu = time.thread_time() - cpu_started
+        return self.value
+
+
+class CollectorRegistry:
+    def __init__(self, intervals: Optional[Dict[str, float]] = None):
+        self.intervals = dict(DEFAULT_INTERVALS)
+        if intervals:
+            self.intervals.update(intervals)
+        self._collectors: Dict[str, Collector] = {}
+        # called with (name, wall seconds, cpu seconds) after every collector run
+        self.observer: Optional[Callable[[str, float, float], None]] = None
+
+    def register(self,
+                name: str,
+                func: Callable[[], Any],
+                interval: Optional[float] = None,
+                cost: str = "low",
+                default: Any = None) -> Collector:
+        if interval is None:
+            interval = self.intervals.get(name, 0)
+        collector = Collector(name, func, interval=interval, cost=cost, default=default)
+        self._collectors[name] = collector
+        return collector
+
+    def unregister(self, name: str) -> bool:
+        return self._collectors.pop(name, None) is not None
+
+    def set_interval(self, name: str, interval: float):
+        self.intervals[name] = interval
+        if name in self._collectors:
+            self._collectors[name].interval = interval
+
+    def get(self, name: str) -> Optional[Collector]:
+        return self._collectors.get(name)
+
+    def value(self, name: str) -> Any:
+        collector = self._collectors.get(name)
+        return collector.value if collector else None
+
+    def names(self) -> List[str]:
+        return list(self._collectors)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._collectors
+
+    def collect(self, force: bool = False) -> Dict[str, Any]:
+        now = time.monotonic()
+        values = {}
+        for name, collector in self._collectors.items():
+            if force or collector.is_due(now):
+                collector.collect(now)
+                if self.observer:
+                    self.observer(name, collector.last_duration, collector.last_cpu)
+            values[name] = collector.value
+        return values
+
+
+def collect_memory() -> Dict[str, int]:
+    mem = psutil.virtual_memory()
+    return {"total": mem.total // (1024 * 1024), "used": round(mem.percent)}
+
+
+DISK_RATE_FIELDS = ("riops", "wiops", "rkbs", "wkbs")
+NET_RATE_FIELDS = ("txkbs", "rxkbs", "txpps", "rxpps", "errin", "errout", "dropin", "dropout")
+
+
+class CounterRates:
+    def __init__(self, wrap: Optional[int] = None):
+        # modulus of a counter known to wrap (2 ** 32); procfs, cgroup and psutil's nowrap counters are 64-bit
+        self.wrap = wrap
+        # device -> (timestamp, counter, ...); plain tuples keep per-device state small
+        self._prev: Dict[str, tuple] = {}
+        self.resets = 0
+
+    def update(self, counters: Dict[str, tuple], now: float) -> Dict[str, tuple]:
+        rates = {}
+        previous, self._prev = self._prev, {}
+        for device, values in counters.items():
+            self._prev[device] = (now,) + tuple(values)
+            prev = previous.get(device)
+            if prev is None or now <= prev[0]:
+                continue
+            deltas = []
+            for value, old in zip(values, prev[1:]):
+                delta = value - old
+                if delta < 0:
+                    # a wrapped counter lands just past zero; anything else is a reset and the interval is skipped
+                    wrapped = value + self.wrap - old if self.wrap else None
+                    if wrapped is not None and old < self.wrap and wrapped < self.wrap // 2:
+                        delta = wrapped
+                    else:
+                        deltas = None
+                        break
+                deltas.append(delta)
+            if deltas is None:
+                self.resets += 1
+                continue
+            elapsed = now - prev[0]
+            rates[device] = tuple(delta / elapsed for delta in deltas)
+        return rates
+
+
+def _rate_dict(fields: tuple, values: Iterable[float]) -> Dict[str, float]:
+    return {field: round(value, 2) for field, value in zip(fields, values)}
+
+
+def _sum_columns(rows: Iterable[tuple], width: int) -> List[float]:
+    totals = [0] * width
+    for row in rows:
+        for i in range(width):
+            totals[i] += row[i]
+    return totals
+
+
+class DiskIOCollector:
+    def __init__(self,
+                per_device: bool = True,
+                exclude: Iterable[str] = ("loop*", "ram*", "zram*"),
+                source: Optional[Callable[[], Dict[str, tuple]]] = None):
+        self.per_device = per_device
+        self.exclude = tuple(exclude)
+        # returns device -> (reads, writes, read bytes, write bytes); psutil when not given
+        self.source = source
+        self.rates = CounterRates()
+        self._whole_disk: Dict[str, bool] = {}
+
+    def _is_whole_disk(self, name: str) -> bool:
+        known = self._whole_disk.get(name)
+        if known is None:
+            # partitions are listed next to their disk; only whole disks appear in /sys/block
+            known = not os.path.isdir('/sys/block') or os.path.exists(os.path.join('/sys/block', name))
+            self._whole_disk[name] = known
+        return known
+
+    def read(self) -> Dict[str, tuple]:
+        if self.source:
+            return {name: values for name, values in self.source().items() if self._is_whole_disk(name)}
+        perdisk = psutil.disk_io_counters(perdisk=True) or {}
+        return {name: (c.read_count, c.write_count, c.read_bytes, c.write_bytes)
+                for name, c in perdisk.items() if self._is_whole_disk(name)}
+
+    def collect(self) -> Dict[str, Any]:
+        return self.build(self.read(), time.monotonic())
+
+    def build(self, counters: Dict[str, tuple], now: float) -> Dict[str, Any]:
+        totals = _sum_columns(counters.values(), 2)
+        diskrw: Dict[str, Any] = {"reads": totals[0], "writes": totals[1]}
+        rates = {}
+        for name, (reads, writes, rbytes, wbytes) in self.rates.update(counters, now).items():
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude):
+                rates[name] = (reads, writes, rbytes / 1024, wbytes / 1024)
+        diskrw["rate"] = _rate_dict(DISK_RATE_FIELDS, _sum_columns(rates.values(), len(DISK_RATE_FIELDS)))
+        if self.per_device:
+            diskrw["devices"] = {name: _rate_dict(DISK_RATE_FIELDS, values) for name, values in rates.items()}
+        return diskrw
+
+
+class NetworkIOCollector:
+    def __init__(self,
+                per_device: bool = True,
+                exclude: Iterable[str] = ("lo",),
+                source: Optional[Callable[[], Dict[str, tuple]]] = None):
+        self.per_device = per_device
+        self.exclude = tuple(exclude)
+        self.source = source
+        self.rates = CounterRates()
+
+    def read(self) -> Dict[str, tuple]:
+        if self.source:
+            return self.source()
+        pernic = psutil.net_io_counters(pernic=True) or {}
+        return {name: (c.bytes_sent, c.bytes_recv, c.packets_sent, c.packets_recv,
+                       c.errin, c.errout, c.dropin, c.dropout)
+                for name, c in pernic.items()}
+
+    def collect(self) -> Dict[str, Any]:
+        return self.build(self.read(), time.monotonic())
+
+    def build(self, counters: Dict[str, tuple], now: float) -> Dict[str, Any]:
+        totals = _sum_columns(counters.values(), 2)
+        network: Dict[str, Any] = {"txbytes": totals[0] // 1024, "rxbytes": totals[1] // 1024}
+        rates = {}
+        for name, values in self.rates.update(counters, now).items():
+            if not any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude):
+                rates[name] = (values[0] / 1024, values[1] / 1024) + values[2:]
+        network["rate"] = _rate_dict(NET_RATE_FIELDS, _sum_columns(rates.values(), len(NET_RATE_FIELDS)))
+        if self.per_device:
+            network["devices"] = {name: _rate_dict(NET_RATE_FIELDS, values) for name, values in rates.items()}
+        return network
+
+
+def collect_load(uptime: str, cpu_stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    if hasattr(os, 'getloadavg'):
+        load_avg = os.getloadavg()
+    else:
+        idle = cpu_stats.get("id", 100) if cpu_stats else 100
+        approx_load = ((100 - idle) / 100.0) * (os.cpu_count() or 1)
+        load_avg = (approx_load, approx_load, approx_load)
+    return {
+        "min1": f"{load_avg[0]:.2f}",
+        "min5": f"{load_avg[1]:.2f}",
+        "min15": f"{load_avg[2]:.2f}",
+        "uptime": uptime
+    }
+
+
+class DiskInventory:
+    MOUNTS_FILE = "/proc/self/mounts"
+    # filesystems without a block device path that still hold real data
+    NETWORK_FSTYPES = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "ceph", "glusterfs", "fuse.sshfs", "zfs"}
+
+    def __init__(self,
+                include_fstypes: Optional[Iterable[str]] = None,
+                exclude_fstypes: Optional[Iterable[str]] = ("squashfs",),
+                include_mounts: Optional[Iterable[str]] = None,
+                exclude_mounts: Optional[Iterable[str]] = None,
+                timeout: float = 2.0,
+                workers: int = 4,
+                refresh_interval: float = 60.0,
+                partitions: Optional[Callable[[], List[Any]]] = None,
+                usage: Optional[Callable[[str], Any]] = None):
+        self.include_fstypes = set(include_fstypes) if include_fstypes else None
+        self.exclude_fstypes = set(exclude_fstypes or ())
+        self.include_mounts = list(include_mounts) if include_mounts else None
+        self.exclude_mounts = list(exclude_mounts or ())
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        # the mount table and statvfs; psutil when not given
+        self.list_partitions = partitions or (lambda: psutil.disk_partitions(all=True))
+        self.usage = usage or (lambda path: psutil.disk_usage(path))
+        self._partitions: Optional[List[Any]] = None
+        self._loaded_at = 0.0
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="diskinfo")
+        self._mounts_fd: Optional[int] = None
+        self._poller = None
+        self._watch_mounts()
+
+    def _watch_mounts(self):
+        # the kernel flags POLLPRI on the mounts file whenever the mount table changes
+        if not hasattr(select, 'poll') or not os.path.exists(self.MOUNTS_FILE):
+            return
+        try:
+            self._mounts_fd = os.open(self.MOUNTS_FILE, os.O_RDONLY)
+            self._poller = select.poll()
+            self._poller.register(self._mounts_fd, select.POLLPRI | select.POLLERR)
+        except OSError:
+            self._mounts_fd = None
+            self._poller = None
+
+    def _drain_mounts_fd(self):
+        os.lseek(self._mounts_fd, 0, os.SEEK_SET)
+        while os.read(self._mounts_fd, 65536):
+            pass
+
+    def _mounts_changed(self) -> bool:
+        if self._partitions is None:
+            return True
+        if self._poller is not None:
+            try:
+                return bool(self._poller.poll(0))
+            except OSError:
+                return True
+        return time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def _wanted(self, partition) -> bool:
+        fstype, mountpoint = partition.fstype, partition.mountpoint
+        if self.include_fstypes is not None:
+            if fstype not in self.include_fstypes:
+                return False
+        elif not (partition.device.startswith('/') or mountpoint == '/' or os.name == 'nt'
+                  or fstype in self.NETWORK_FSTYPES):
+            return False
+        if fstype in self.exclude_fstypes:
+            return False
+        if self.include_mounts is not None and not any(fnmatch.fnmatch(mountpoint, p) for p in self.include_mounts):
+            return False
+        return not any(fnmatch.fnmatch(mountpoint, p) for p in self.exclude_mounts)
+
+    def partitions(self) -> List[Any]:
+        if self._mounts_changed():
+            if self._mounts_fd is not None:
+                self._drain_mounts_fd()
+            seen_devices = set()
+            seen_mounts = set()
+            partitions = []
+            for partition in self.list_partitions():
+                if not self._wanted(partition) or partition.mountpoint in seen_mounts:
+                    continue
+                seen_mounts.add(partition.mountpoint)
+                # bind mounts show the same block device more than once
+                if partition.device.startswith('/'):
+                    if partition.device in seen_devices:
+                        continue
+                    seen_devices.add(partition.device)
+                partitions.append(partition)
+            self._partitions = partitions
+            self._loaded_at = time.monotonic()
+            mountpoints = {p.mountpoint for p in partitions}
+            self._last = {k: v for k, v in self._last.items() if k in mountpoints}
+        return self._partitions
+
+    def collect(self) -> List[Dict[str, Any]]:
+        pending = {}
+        for partition in self.partitions():
+            mountpoint = partition.mountpoint
+            hung = self._inflight.get(mountpoint)
+            if hung is not None:
+                if not hung.done():
+                    continue
+                del self._inflight[mountpoint]
+            pending[partition] = self._executor.submit(self.usage, mountpoint)
+
+        if pending:
+            wait(pending.values(), timeout=self.timeout)
+        for partition, future in pending.items():
+            mountpoint = partition.mountpoint
+            if not future.done():
+                # a hung mount keeps its last value until the stat call returns
+                self._inflight[mountpoint] = future
+                continue
+            try:
+                disk_usage = future.result()
+            except (PermissionError, OSError):
+                self._last.pop(mountpoint, None)
+                continue
+            if disk_usage.total > 0:
+                self._last[mountpoint] = {
+                    "total": disk_usage.total // 1024,
+                    "name": mountpoint,
+                    "used": round((disk_usage.used / disk_usage.total) * 100, 2),
+                    "type": partition.fstype
+                }
+
+        diskinfo = [self._last[p.mountpoint] for p in self._partitions if p.mountpoint in self._last]
+        return diskinfo or [{"total": 0, "name": "/unknown", "used": 0.0, "type": "unknown"}]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._mounts_fd is not None:
+            os.close(self._mounts_fd)
+            self._mounts_fd = None
+
+    def __del__(self):
+        if getattr(self, "_mounts_fd", None) is not None:
+            self.close()
+
+
+class HostCollectors:
+    def __init__(self,
+                metadata,
+                per_core: bool = False,
+                intervals: Optional[Dict[str, float]] = None,
+                top_processes: int = 0,
+                disk_filters: Optional[Dict[str, Any]] = None,
+                procfs: bool = False,
+                cgroup: str = "off"):
+        self.metadata = metadata
+        # on Linux the procfs reader keeps the /proc files open; anything it could not open stays on psutil
+        self.procfs = open_procfs() if procfs else None
+        fast = self.procfs.has if self.procfs else lambda name: False
+        self.cpu_sampler = CpuSampler(per_core=per_core, cpu_times=self.procfs.cpu_times if fast("stat") else None)
+        mounts = fast("mounts")
+        self.disk_inventory = DiskInventory(partitions=self.procfs.partitions if mounts else None,
+                                            usage=disk_usage if mounts else None, **(disk_filters or {}))
+        self.disk_io = DiskIOCollector(source=self.procfs.disk_counters if fast("diskstats") else None)
+        self.network_io = NetworkIOCollector(source=self.procfs.net_counters if fast("netdev") else None)
+        self.process_collector = ProcessCollector(top_processes) if top_processes > 0 else None
+        self.cgroup_mode = cgroup
+        self.cgroup = None
+        if cgroup != "off":
+            # the cgroup collector builds on CounterRates from this module
+            from cgroup import CGROUP_MODES, open_cgroup
+            if cgroup not in CGROUP_MODES:
+                raise ValueError(f"Unknown cgroup mode '{cgroup}', expected one of {CGROUP_MODES}")
+            self.cgroup = open_cgroup()
+            if self.cgroup is None:
+                # no cgroup v2 hierarchy: report host metrics only
+                self.cgroup_mode = "off"
+        self.registry = CollectorRegistry(intervals)
+        self._register()
+
+    def _register(self):
+        registry = self.registry
+        registry.register("cpu", self.cpu_sampler.sample,
+                          default={"sy": 0, "wa": 0, "id": 100, "us": 0})
+        procfs = self.procfs
+        registry.register("memory", procfs.memory if procfs and procfs.has("meminfo") else collect_memory,
+                          default={"total": 0, "used": 0})
+        registry.register("load", lambda: collect_load(self.metadata.uptime(), registry.value("cpu")),
+                          default={"min1": "0.00", "min5": "0.00", "min15": "0.00", "uptime": "unknown"})
+        registry.register("diskrw", self.disk_io.collect, default={"reads": 0, "writes": 0})
+        registry.register("network", self.network_io.collect, default={"txbytes": 0, "rxbytes": 0})
+        registry.register("diskinfo", self.disk_inventory.collect, cost="high",
+                          default=[{"total": 0, "name": "/unknown", "used": 0.0, "type": "unknown"}])
+        registry.register("metadata", lambda: {"commit": self.metadata.commit, "core": os.cpu_count()},
+                          cost="high", default={"commit": "", "core": 0})
+        if self.process_collector:
+            registry.register("processes", self.process_collector.sample, cost="high",
+                              default={"cpu": [], "rss": [], "io": []})
+        if self.cgroup:
+            registry.register("cgroup", self.cgroup.collect, default={})
+
+    def collect(self, force: bool = False) -> Dict[str, Any]:
+        return self.registry.collect(force)
+
+    def close(self):
+        self.disk_inventory.close()
+        if self.procfs:
+            self.procfs.close()
+        if self.cgroup:
+            self.cgroup.close()
@@ -0,0 +1,188 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+METRIC_PREFIX = "health"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+JSON_CONTENT_TYPE = "application/json"
+# payload keys whose children become labels instead of name segments
+LABEL_KEYS = {"devices": "device", "latency": "op", "cores": "core", "diskinfo": "mount",
+              "counts": "generation", "collections": "generation"}
+SKIP_KEYS = ("logs", "processes", "delta")
+_NAME_INVALID = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _metric_name(parts: List[str]) -> str:
+    return _NAME_INVALID.sub("_", "_".join(parts))
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        # load averages are sent as preformatted strings
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _samples(value: Any, parts: List[str], labels: Tuple[Tuple[str, str], ...]) -> Iterator[Tuple[str, tuple, float]]:
+    if isinstance(value, dict):
+        label = LABEL_KEYS.get(parts[-1]) if len(parts) > 1 else None
+        for key, child in value.items():
+            if key in SKIP_KEYS:
+                continue
+            if label and isinstance(child, dict):
+                yield from _samples(child, parts, labels + ((label, key),))
+            else:
+                yield from _samples(child, parts + [key], labels)
+    elif isinstance(value, list):
+        label = LABEL_KEYS.get(parts[-1], "index")
+        for i, item in enumerate(value):
+            if isinstance(item, dict):
+                item = dict(item)
+                name = item.pop("name", i)
+                yield from _samples(item, parts, labels + ((label, name),))
+            else:
+                yield from _samples(item, parts, labels + ((label, i),))
+    else:
+        number = _number(value)
+        if number is not None:
+            yield _metric_name(parts), labels, number
+
+
+def render_prometheus(params: Dict[str, Any], timestamp: float) -> bytes:
+    families: Dict[str, List[str]] = {}
+    for name, labels, value in _samples(params, [METRIC_PREFIX], ()):
+        label_text = ",".join(f'{k}="{_label_value(v)}"' for k, v in labels)
+        families.setdefault(name, []).append(f"{name}{{{label_text}}} {value!r}" if label_text else f"{name} {value!r}")
+
+    info = params.get("info", {})
+    info_labels = {"service": params.get("service", ""), "env": params.get("env", ""),
+                   "version": info.get("version", ""), "commit": info.get("commit", "")}
+    lines = [f"# TYPE {METRIC_PREFIX}_agent_info gauge",
+             f"{METRIC_PREFIX}_agent_info{{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in info_labels.items()) + "} 1",
+             f"# TYPE {METRIC_PREFIX}_sample_timestamp_seconds gauge",
+             f"{METRIC_PREFIX}_sample_timestamp_seconds {timestamp:.3f}"]
+    for name, samples in families.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(samples)
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def render_json(params: Dict[str, Any], timestamp: float) -> bytes:
+    snapshot = {k: v for k, v in params.items() if k not in SKIP_KEYS}
+    snapshot["timestamp"] = timestamp
+    return json.dumps(snapshot, separators=(',', ':')).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MetricsEndpoint"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        fmt = self.server.ROUTES.get(path)
+        if fmt is None:
+            self._reply(404, "text/plain", b"Not found\n")
+            return
+        rendered = self.server.body(fmt)
+        if rendered is None:
+            self._reply(503, "text/plain", b"No sample collected yet\n")
+            return
+        generation, body = rendered
+        etag = f'"{generation}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._reply(304, None, b"", etag)
+            return
+        self._reply(200, PROMETHEUS_CONTENT_TYPE if fmt == "prometheus" else JSON_CONTENT_TYPE, body, etag)
+
+    def _reply(self, status: int, content_type: Optional[str], body: bytes, etag: Optional[str] = None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsEndpoint(ThreadingHTTPServer):
+    daemon_threads = True
+    ROUTES = {"/metrics": "prometheus", "/health": "json", "/": "json"}
+    RENDERERS = {"prometheus": render_prometheus, "json": render_json}
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9108):
+        super().__init__((host, port), _Handler)
+        self.generation = 0
+        self.scrapes = 0
+        self.renders = 0
+        self._params: Optional[Dict[str, Any]] = None
+        self._timestamp = 0.0
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def publish(self, payload: Dict[str, Any]):
+        # called from the sampling thread: only swap the reference, rendering happens on scrape
+        params = payload.get("params")
+        if not isinstance(params, dict):
+            return
+        with self._lock:
+            self._params = params
+            self._timestamp = time.time()
+            self.generation += 1
+            self._bodies = {}
+
+    def body(self, fmt: str) -> Optional[Tuple[int, bytes]]:
+        with self._lock:
+            self.scrapes += 1
+            if fmt in self._bodies:
+                return self.generation, self._bodies[fmt]
+        # one render per sample and format, however many scrapes arrive at once
+        with self._render_lock:
+            with self._lock:
+                if fmt in self._bodies:
+                    return self.generation, self._bodies[fmt]
+                params, timestamp, generation = self._params, self._timestamp, self.generation
+            if params is None:
+                return None
+            body = self.RENDERERS[fmt](params, timestamp)
+            with self._lock:
+                self.renders += 1
+                if generation == self.generation:
+                    self._bodies[fmt] = body
+            return generation, body
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"generation": self.generation, "scrapes": self.scrapes, "renders": self.renders}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="metrics-endpoint", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SKIP_SECTIONS = ("processes",)
+
+
+def flatten_metrics(section: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    metrics: Dict[str, float] = {}
+    for key, value in section.items():
+        if key in SKIP_SECTIONS:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            metrics[name] = float(value)
+        elif isinstance(value, str):
+            # load averages are sent as preformatted strings
+            try:
+                metrics[name] = float(value)
+            except ValueError:
+                pass
+        elif isinstance(value, dict):
+            metrics.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                if isinstance(item, dict):
+                    label = item.get("name", i)
+                    metrics.update(flatten_metrics({k: v for k, v in item.items() if k != "name"},
+                                                   f"{name}.{label}."))
+    return metrics
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def aggregate(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "min": min(values),
+        "max": max(values),
+        "mean": round(sum(values) / len(values), 4),
+        "p95": percentile(values, 95)
+    }
+
+
+class MetricHistory:
+    def __init__(self, capacity: int = 360, max_series: int = 2000):
+        self.capacity = max(1, capacity)
+        self.max_series = max_series
+        self.dropped_series = 0
+        self._times = array('d', [0.0]) * self.capacity
+        self._series: Dict[str, array] = {}
+        # name -> sequence number of the last sample that carried it
+        self._last_seen: Dict[str, int] = {}
+        self._sequence = 0
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def metrics(self) -> List[str]:
+        return sorted(self._series)
+
+    def record(self, metrics: Dict[str, float], timestamp: Optional[float] = None):
+        with self._lock:
+            index = self._head
+            self._times[index] = timestamp if timestamp is not None else time.time()
+            sequence = self._sequence = self._sequence + 1
+            expired = []
+            for name, series in self._series.items():
+                value = metrics.get(name)
+                if value is None:
+                    series[index] = math.nan
+                    # gone for a whole ring, so every slot is empty (churned veth, unmounted disk)
+                    if sequence - self._last_seen[name] >= self.capacity:
+                        expired.append(name)
+                else:
+                    series[index] = value
+                    self._last_seen[name] = sequence
+            for name in expired:
+                del self._series[name]
+                del self._last_seen[name]
+            for name, value in metrics.items():
+                if name not in self._series:
+                    if len(self._series) >= self.max_series:
+                        self.dropped_series += 1
+                        continue
+                    series = array('d', [math.nan]) * self.capacity
+                    series[index] = value
+                    self._series[name] = series
+                    self._last_seen[name] = sequence
+            self._head = (index + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _indices(self, window: Optional[float], now: Optional[float]) -> Iterable[int]:
+        # newest first
+        since = None if window is None else (now if now is not None else time.time()) - window
+        for offset in range(1, self._count + 1):
+            index = (self._head - offset) % self.capacity
+            if since is not None and self._times[index] < since:
+                break
+            yield index
+
+    def samples(self, metric: str, window: Optional[float] = None, now: Optional[float] = None) -> List[Tuple[float, float]]:
+        with self._lock:
+            series = self._series.get(metric)
+            if series is None:
+                return []
+            points = [(self._times[i], series[i]) for i in self._indices(window, now) if not math.isnan(series[i])]
+        points.reverse()
+        return points
+
+    def values(self, metric: str, window: Optional[float] = None, now: Optional[float] = None) -> List[float]:
+        return [value for _, value in self.samples(metric, window, now)]
+
+    def aggregate(self, metric: str, window: Optional[float] = None, now: Optional[float] = None) -> Dict[str, float]:
+        return aggregate(self.values(metric, window, now))
+
+    def rollup(self, metric: str, bucket: float = 60, window: Optional[float] = None,
+               now: Optional[float] = None) -> List[Dict[str, float]]:
+        buckets: Dict[float, List[float]] = {}
+        for ts, value in self.samples(metric, window, now):
+            buckets.setdefault(ts - ts % bucket, []).append(value)
+        return [dict(aggregate(values), ts=start) for start, values in sorted(buckets.items())]
+
+    def summary(self, window: Optional[float] = None, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        return {metric: self.aggregate(metric, window, now) for metric in self.metrics()}
@@ -0,0 +1,26 @@
+import importlib
+import threading
+import types
+from typing import Any
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        # only reached for attributes the proxy itself does not define
+        module = self._module or self._load()
+        return getattr(module, attr)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
@@ -1,50 +1,113 @@
+import json
 import logging
+import os
+import shutil
 import subprocess
 import threading
 import time
-from typing import Dict, List
+import warnings
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+
+# rough JSON overhead of one {"ct": ..., "level": ..., "msg": ...} entry
+ENTRY_OVERHEAD = 40
+SYSLOG_FILES = ("/var/log/syslog", "/var/log/messages")
+# syslog priority (0 emerg .. 7 debug) -> logging level
+PRIORITY_LEVELS = {0: logging.CRITICAL, 1: logging.CRITICAL, 2: logging.CRITICAL, 3: logging.ERROR,
+                   4: logging.WARNING, 5: logging.INFO, 6: logging.INFO, 7: logging.DEBUG}
 
 
 class LogPayload:
+    __slots__ = ("timestamp", "level", "message", "count")
+
     def __init__(self, timestamp: int, level: int, message: str):
         self.timestamp = timestamp
         self.level = level
         self.message = message
+        self.count = 1
 
     def to_dict(self) -> Dict[str, object]:
-        return {"ct": self.timestamp, "level": self.level, "msg": self.message}
+        message = self.message if self.count == 1 else f"{self.message} (repeated {self.count} times)"
+        return {"ct": self.timestamp, "level": self.level, "msg": message}
+
+    def size(self) -> int:
+        return len(self.message) + ENTRY_OVERHEAD
+
 
 class LogCollector(logging.Handler):
-    def __init__(self):
+    def __init__(self, capacity: int = 1000, max_bytes: int = 64 * 1024):
         super().__init__()
-        self.log_arr: List[LogPayload] = []
+        self.capacity = max(1, capacity)
+        self.max_bytes = max_bytes
+        self.log_arr: Deque[LogPayload] = deque()
         self.log_mutex = threading.Lock()
+        self.dropped = 0
+        self.collapsed = 0
+        self._dropped_reported = 0
 
     def emit(self, record: logging.LogRecord):
         if record.levelno == logging.DEBUG:
             return
-        entry = LogPayload(
-            timestamp=int(record.created * 1000),
-            level=record.levelno,
-            message=record.getMessage()
-        )
+        message = record.getMessage()
         with self.log_mutex:
-            self.log_arr.append(entry)
+            if self.log_arr:
+                last = self.log_arr[-1]
+                if last.level == record.levelno and last.message == message:
+                    last.count += 1
+                    self.collapsed += 1
+                    return
+            if len(self.log_arr) >= self.capacity:
+                self.log_arr.popleft()
+                self.dropped += 1
+            self.log_arr.append(LogPayload(int(record.created * 1000), record.levelno, message))
 
     def get_logs(self) -> List[Dict[str, object]]:
+        batch = []
         with self.log_mutex:
-            arr, self.log_arr = self.log_arr, []
-        return [log.to_dict() for log in arr]
+            budget = self.max_bytes
+            while self.log_arr:
+                size = self.log_arr[0].size()
+                # always take at least one entry so an oversized record cannot block the ring
+                if batch and size > budget:
+                    break
+                batch.append(self.log_arr.popleft())
+                budget -= size
+            dropped = self.dropped - self._dropped_reported
+            self._dropped_reported = self.dropped
+
+        logs = [log.to_dict() for log in batch]
+        if dropped:
+            logs.append({"ct": int(time.time() * 1000), "level": logging.WARNING,
+                         "msg": f"{dropped} log records dropped (buffer capacity {self.capacity})"})
+        return logs
+
+    def stats(self) -> Dict[str, int]:
+        with self.log_mutex:
+            return {
+                "buffered": len(self.log_arr),
+                "dropped": self.dropped,
+                "collapsed": self.collapsed
+            }
 
 collector = LogCollector()
 logger = logging.getLogger("MonitorLogger")
-logger.setLevel(logging.INFO)
-logger.addHandler(collector)
+_install_lock = threading.Lock()
+
+
+def install(level: int = logging.INFO):
+    # attaching the collector is left to whoever forwards logs, so importing has no side effects
+    with _install_lock:
+        if collector not in logger.handlers:
+            logger.setLevel(level)
+            logger.addHandler(collector)
 
-logger.info("System monitor started.")
-logger.warning("CPU usage is high.")
 
 def read_system_logs(cmd: str = "journalctl -n 5"):
+    # one-shot snapshot through a shell; kept for existing callers only
+    warnings.warn("read_system_logs is deprecated, use follow_system_logs", DeprecationWarning, stacklevel=2)
+    install()
     try:
         output = subprocess.check_output(cmd, shell=True, text=True)
         for line in output.strip().splitlines():
@@ -52,8 +115,241 @@ def read_system_logs(cmd: str = "journalctl -n 5"):
     except Exception as e:
         logger.error(f"Failed to read system logs: {e}")
 
+class SystemLogFollower(ABC):
+    def __init__(self,
+                state_file: Optional[str] = None,
+                max_rate: float = 50.0,
+                units: Optional[Iterable[str]] = None,
+                max_priority: int = 6,
+                target: Optional[logging.Logger] = None):
+        self.state_file = state_file
+        self.max_rate = max_rate
+        self.units = list(units) if units else None
+        self.max_priority = max_priority
+        self.target = target or logger
+        self.running = False
+        self.forwarded = 0
+        self.suppressed = 0
+        self._suppressed_reported = 0
+        self._tokens = max_rate
+        self._last_refill = time.monotonic()
+        self._last_save = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self.running = False
+        self._interrupt()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self._save_state(force=True)
+
+    @abstractmethod
+    def _interrupt(self):
+        # wakes _run so that stop() does not wait for the next line
+        ...
+
+    @abstractmethod
+    def _run(self):
+        ...
+
+    @abstractmethod
+    def _state(self) -> Optional[str]:
+        # the resume position persisted to state_file
+        ...
+
+    def _load_state(self) -> Optional[str]:
+        if not self.state_file:
+            return None
+        try:
+            with open(self.state_file, 'r') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _save_state(self, force: bool = False):
+        state = self._state()
+        if not self.state_file or state is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < 5.0:
+            return
+        self._last_save = now
+        try:
+            tmp = self.state_file + ".tmp"
+            with open(tmp, 'w') as f:
+                f.write(state)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            self.target.warning(f"Unable to persist system log position: {e}")
+
+    def _forward(self, level: int, message: str):
+        now = time.monotonic()
+        self._tokens = min(self.max_rate, self._tokens + (now - self._last_refill) * self.max_rate)
+        self._last_refill = now
+        if self._tokens < 1:
+            self.suppressed += 1
+            return
+        self._tokens -= 1
+        if self.suppressed > self._suppressed_reported:
+            self.target.warning(f"[SYSLOG] {self.suppressed - self._suppressed_reported} entries suppressed by rate limit")
+            self._suppressed_reported = self.suppressed
+        self.target.log(level, f"[SYSLOG] {message}")
+        self.forwarded += 1
+        self._save_state()
+
+
+class JournalFollower(SystemLogFollower):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursor = self._load_state()
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _command(self) -> List[str]:
+        cmd = ["journalctl", "--follow", "--output=json", "--no-pager", f"--priority={self.max_priority}"]
+        for unit in self.units or ():
+            cmd.append(f"--unit={unit}")
+        if self.cursor:
+            cmd.append(f"--after-cursor={self.cursor}")
+        else:
+            cmd.append("--lines=0")
+        return cmd
+
+    def _run(self):
+        while self.running:
+            try:
+                self._proc = subprocess.Popen(self._command(), stdout=subprocess.PIPE,
+                                              stderr=subprocess.DEVNULL, text=True, bufsize=1)
+                for line in self._proc.stdout:
+                    self._handle(line)
+                    if not self.running:
+                        break
+            except Exception as e:
+                self.target.error(f"Failed to follow system journal: {e}")
+            finally:
+                self._interrupt()
+            if self.running:
+                # journalctl exited on its own; resume from the cursor after a pause
+                time.sleep(5)
+
+    def _handle(self, line: str):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        self.cursor = entry.get("__CURSOR", self.cursor)
+        message = entry.get("MESSAGE")
+        if isinstance(message, list):
+            # non-UTF-8 messages are exported as byte arrays
+            message = bytes(message).decode('utf-8', errors='replace')
+        if not message:
+            return
+        try:
+            priority = int(entry.get("PRIORITY", 6))
+        except (TypeError, ValueError):
+            priority = 6
+        source = entry.get("_SYSTEMD_UNIT") or entry.get("SYSLOG_IDENTIFIER") or ""
+        self._forward(PRIORITY_LEVELS.get(priority, logging.INFO), f"{source}: {message}" if source else message)
+
+    def _state(self) -> Optional[str]:
+        return self.cursor
+
+    def _interrupt(self):
+        proc, self._proc = self._proc, None
+        if proc and proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+class FileFollower(SystemLogFollower):
+    def __init__(self, path: str, *args, poll_interval: float = 1.0, **kwargs):
+        max_priority = kwargs.pop("max_priority", None)
+        super().__init__(*args, **kwargs)
+        if max_priority is not None:
+            # syslog lines carry no priority; only the journal can filter on it
+            self.target.warning(f"max_priority needs the systemd journal; following {path} unfiltered")
+        self.path = path
+        self.poll_interval = poll_interval
+        self.inode: Optional[int] = None
+        self.offset = 0
+        self._stop_event = threading.Event()
+        state = self._load_state()
+        if state:
+            try:
+                inode, offset = state.split()
+                self.inode, self.offset = int(inode), int(offset)
+            except ValueError:
+                pass
+        if self.inode is None:
+            # like the journal follower, a fresh start only picks up new lines
+            try:
+                st = os.stat(path)
+                self.inode, self.offset = st.st_ino, st.st_size
+            except OSError:
+                pass
+
+    def _run(self):
+        f = None
+        while self.running:
+            try:
+                st = os.stat(self.path)
+                if f is None or st.st_ino != self.inode:
+                    if f is not None:
+                        # rotated: finish the old file before switching
+                        self._read_lines(f)
+                        f.close()
+                    f = open(self.path, 'rb')
+                    if st.st_ino != self.inode:
+                        self.inode, self.offset = st.st_ino, 0
+                    f.seek(self.offset if st.st_size >= self.offset else 0)
+                elif st.st_size < self.offset:
+                    f.seek(0)
+                    self.offset = 0
+                self._read_lines(f)
+            except OSError:
+                pass
+            self._stop_event.wait(self.poll_interval)
+        if f is not None:
+            f.close()
+
+    def _read_lines(self, f):
+        while self.running:
+            line = f.readline()
+            if not line or not line.endswith(b"\n"):
+                # leave a partially written line for the next pass
+                f.seek(self.offset)
+                return
+            self.offset = f.tell()
+            line = line.rstrip(b"\n").decode('utf-8', errors='replace')
+            if self.units and not any(f" {unit}[" in line or f" {unit}:" in line for unit in self.units):
+                continue
+            if line:
+                self._forward(logging.INFO, line)
+
+    def _state(self) -> Optional[str]:
+        return f"{self.inode} {self.offset}" if self.inode is not None else None
+
+    def _interrupt(self):
+        self._stop_event.set()
+
+
+def follow_system_logs(path: Optional[str] = None, **kwargs) -> Optional[SystemLogFollower]:
+    install()
+    if path is None and shutil.which("journalctl"):
+        return JournalFollower(**kwargs).start()
+    path = path or next((p for p in SYSLOG_FILES if os.path.exists(p)), None)
+    if path is None:
+        logger.warning("No system journal or syslog file available to follow")
+        return None
+    return FileFollower(path, **kwargs).start()
+
 def flush_logs() -> List[Dict[str, object]]:
-    logs = collector.get_logs()
-    if logs:
-        print("Sending logs:", logs)
-    return logs
+    return collector.get_logs()
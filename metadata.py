@@ -0,0 +1,187 @@
+import os
+import subprocess
+import time
+from typing import Optional, Tuple
+
+from lazy import LazyModule
+
+psutil = LazyModule("psutil")
+
+
+def _find_git_dir(path: str) -> Optional[str]:
+    path = os.path.abspath(path)
+    while True:
+        candidate = os.path.join(path, '.git')
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            # worktrees and submodules use a "gitdir: <path>" pointer file
+            try:
+                with open(candidate, 'r') as f:
+                    line = f.readline().strip()
+                if line.startswith('gitdir:'):
+                    return os.path.normpath(os.path.join(path, line[len('gitdir:'):].strip()))
+            except OSError:
+                pass
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def format_uptime(uptime_seconds: float) -> str:
+    days = int(uptime_seconds // 86400)
+    hours = int((uptime_seconds % 86400) // 3600)
+    if days > 0:
+        return f"{days} days, {hours} hours"
+    else:
+        return f"{hours} hours"
+
+
+class BuildMetadata:
+    def __init__(self, path: Optional[str] = None):
+        self.git_dir = _find_git_dir(path or os.getcwd())
+        self.common_dir = self._get_common_dir()
+        self._signature = None
+        self._ref: Optional[str] = None
+        self._commit: Optional[str] = None
+        self._version: Optional[str] = None
+        self._project: Optional[str] = None
+        self._uptime_base: Optional[Tuple[float, float]] = None
+
+    def _get_common_dir(self) -> Optional[str]:
+        if not self.git_dir:
+            return None
+        try:
+            with open(os.path.join(self.git_dir, 'commondir'), 'r') as f:
+                return os.path.normpath(os.path.join(self.git_dir, f.readline().strip()))
+        except OSError:
+            return self.git_dir
+
+    def _current_signature(self):
+        head = os.path.join(self.git_dir, 'HEAD')
+        if self._ref:
+            return (_stat_key(head),
+                    _stat_key(os.path.join(self.common_dir, self._ref)),
+                    _stat_key(os.path.join(self.common_dir, 'packed-refs')))
+        return (_stat_key(head),)
+
+    def _read_ref(self, ref: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.common_dir, ref), 'r') as f:
+                return f.readline().strip() or None
+        except OSError:
+            pass
+        try:
+            with open(os.path.join(self.common_dir, 'packed-refs'), 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[1] == ref:
+                        return parts[0]
+        except OSError:
+            pass
+        return None
+
+    def _resolve(self):
+        self._ref = None
+        self._commit = None
+        self._version = None
+        try:
+            with open(os.path.join(self.git_dir, 'HEAD'), 'r') as f:
+                head = f.readline().strip()
+            if head.startswith('ref:'):
+                self._ref = head[len('ref:'):].strip()
+                self._commit = self._read_ref(self._ref)
+            elif head:
+                self._commit = head
+        except OSError:
+            pass
+        self._signature = self._current_signature()
+
+    def refresh(self) -> bool:
+        if not self.git_dir:
+            return False
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+        self._resolve()
+        return True
+
+    @property
+    def commit(self) -> str:
+        self.refresh()
+        if not self._commit:
+            self._commit = "nogit" + str(int(time.time()))[:8]
+        return self._commit
+
+    @property
+    def version(self) -> str:
+        self.refresh()
+        if self._version is None:
+            self._version = self._describe()
+        return self._version
+
+    def _describe(self) -> str:
+        if self.git_dir:
+            # tags are only resolved when HEAD moves, so this fork is rare
+            try:
+                result = subprocess.run(['git', '--git-dir', self.git_dir, 'describe', '--tags', '--abbrev=0'],
+                                        capture_output=True, text=True, timeout=5)
+                if result.returncode == 0:
+                    return result.stdout.strip()
+            except:
+                pass
+            if self._commit:
+                return f"git-{self._commit[:7]}"
+        return "v1.0.0"
+
+    @property
+    def project(self) -> str:
+        if self._project is None:
+            self._project = self._origin_project() or "gvexwt"
+        return self._project
+
+    def _origin_project(self) -> Optional[str]:
+        if not self.common_dir:
+            return None
+        try:
+            in_origin = False
+            with open(os.path.join(self.common_dir, 'config'), 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith('['):
+                        in_origin = line.replace(' ', '') == '[remote"origin"]'
+                    elif in_origin and line.startswith('url') and '=' in line:
+                        url = line.split('=', 1)[1].strip()
+                        if '/' in url:
+                            project = url.split('/')[-1].replace('.git', '')
+                            return project[:6] if len(project) > 6 else project
+        except OSError:
+            pass
+        return None
+
+    def uptime_seconds(self) -> float:
+        if self._uptime_base is None:
+            try:
+                with open('/proc/uptime', 'r') as f:
+                    base = float(f.readline().split()[0])
+            except:
+                base = time.time() - psutil.boot_time()
+            self._uptime_base = (base, time.monotonic())
+        base, anchor = self._uptime_base
+        return base + (time.monotonic() - anchor)
+
+    def uptime(self) -> str:
+        try:
+            return format_uptime(self.uptime_seconds())
+        except:
+            return "uptime unknown"
@@ -2,24 +2,44 @@ import getpass
 import json
 import logging
 import os
-import subprocess
 import threading
 import time
 import uuid
-from typing import Any, Dict, Optional
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import logs
-import psutil
+from adaptive import AdaptiveInterval
+from alerts import AlertEngine
 from api import HealthAPIClient
+from cgroup import apply_cgroup
+from collectors import HostCollectors
+from history import MetricHistory, flatten_metrics
+from metadata import BuildMetadata
+from scheduler import Scheduler
+from selfstats import AgentStats
+from sender import PayloadQueue, SenderPool
+from shared import SharedSampler
+from spool import Spool
+
+if TYPE_CHECKING:
+    from endpoint import MetricsEndpoint
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# placeholder for an API client that has not been built yet
+_LAZY = object()
+
+
+def configure_logging(log_file: Optional[str] = 'monitor.log', level: int = logging.INFO):
+    # leaves an application's own logging setup alone; the file is only created on the first record
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handlers: List[logging.Handler] = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file, delay=True))
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('monitor.log'),
-        logging.StreamHandler()
-    ]
-)
 
 class HealthMonitor:
     def __init__(self,
@@ -29,14 +49,29 @@ class HealthMonitor:
                 project: Optional[str] = None,
                 service: str = "4pc9typi",
                 version: Optional[str] = None,
-                auto_start: bool = False):
+                auto_start: bool = False,
+                per_core: bool = False,
+                intervals: Optional[Dict[str, float]] = None,
+                top_processes: int = 0,
+                disk_filters: Optional[Dict[str, Any]] = None,
+                history_size: int = 360,
+                alert_rules: Optional[List[Any]] = None,
+                alert_interval: float = 300,
+                self_stats: bool = True,
+                sampler: Optional[SharedSampler] = None,
+                procfs: bool = False,
+                cgroup: str = "off",
+                lazy: bool = False):
         self.atom=1
+        self.lazy = lazy
+        self.sampler = sampler
+        self.metadata = sampler.metadata if sampler else BuildMetadata()
         self.env = env
         self.stype = stype
         self.name = name if name else self._generate_worker_name()
-        self.project = project if project else self._get_project_name()
+        self._project = project
         self.service = service
-        self.version = version if version else self._get_version()
+        self._version = version
         self.user = getpass.getuser()
         self.running = False
         self.poll_interval = 10
@@ -44,165 +79,147 @@ class HealthMonitor:
         self.capture_count = 0
         self.max_captures = None
         self.monitor_thread = None
+        self.scheduler: Optional[Scheduler] = None
+        self.adaptive: Optional[AdaptiveInterval] = None
+        self._stop_event = threading.Event()
+        self.sender: Optional[SenderPool] = None
+        self.spool: Optional[Spool] = None
+        self.log_follower: Optional[logs.SystemLogFollower] = None
+        self.metrics_endpoint: Optional["MetricsEndpoint"] = None
         self.start_time = int(time.time() * 1000)
         self.auto_start = auto_start
-        self.api_client = HealthAPIClient()
+        # with local rules, remote alerts are only polled on a slow cadence and
+        # notifications go out when something changes
+        # monitors on a shared sampler post through its session, each as its own service
+        transport = {"session": sampler.session, "service_id": service} if sampler else {}
+        self._api_factory = (partial(HealthAPIClient, alert_interval=alert_interval, notify_on_change=True, **transport)
+                             if alert_rules else partial(HealthAPIClient, **transport))
+        self._api_client: Any = _LAZY
+        self._init_lock = threading.Lock()
+        # the collector options only apply to a standalone monitor
+        self._host_factory = partial(HostCollectors, self.metadata, per_core=per_core, intervals=intervals,
+                                     top_processes=top_processes, disk_filters=disk_filters, procfs=procfs,
+                                     cgroup=cgroup)
+        self._cgroup = cgroup
+        self._host: Optional[HostCollectors] = None
+        if sampler:
+            self.agent_stats = sampler.agent_stats if self_stats else None
+        else:
+            self.agent_stats = AgentStats() if self_stats else None
+        self.history = MetricHistory(history_size) if history_size > 0 else None
+        self.alert_engine = AlertEngine(alert_rules, self.history) if alert_rules else None
 
         self.logger = logging.getLogger(__name__)
+        if not lazy:
+            # lazy mode defers these to start() or first use
+            self._initialize()
+            self._api_client = self._build_api_client()
+            self._project = self.project
+            self._version = self.version
+            self._host = self._build_host()
 
         if self.auto_start:
             self.start()
 
+    def _initialize(self):
+        configure_logging()
+        logs.install()
+
+    def _build_host(self) -> HostCollectors:
+        if self.sampler:
+            host = self.sampler.host
+        else:
+            host = self._host_factory()
+            if self.agent_stats is not None:
+                record = self.agent_stats.record
+                host.registry.observer = lambda name, wall, cpu: record(f"collector.{name}", wall, cpu)
+        if self._cgroup != "off" and host.cgroup is None:
+            self.logger.warning("No cgroup v2 hierarchy found - reporting host metrics only")
+        return host
+
+    @property
+    def host(self) -> HostCollectors:
+        # opening the collectors imports psutil and opens /proc files, so lazy mode waits for the first sample
+        if self._host is None:
+            with self._init_lock:
+                if self._host is None:
+                    self._host = self._build_host()
+        return self._host
+
+    @property
+    def collectors(self):
+        return self.host.registry
+
+    def _build_api_client(self):
+        client = self._api_factory()
+        self._instrument(client)
+        return client
+
+    @property
+    def api_client(self):
+        if self._api_client is _LAZY:
+            with self._init_lock:
+                if self._api_client is _LAZY:
+                    self._api_client = self._build_api_client()
+        return self._api_client
+
+    @api_client.setter
+    def api_client(self, api_client):
+        self._api_client = api_client
+
+    @property
+    def project(self) -> str:
+        if not self._project:
+            self._project = self._get_project_name()
+        return self._project
+
+    @project.setter
+    def project(self, project: str):
+        self._project = project
+
+    @property
+    def version(self) -> str:
+        if not self._version:
+            self._version = self._get_version()
+        return self._version
+
+    @version.setter
+    def version(self, version: str):
+        self._version = version
+
     def _generate_worker_name(self) -> str:
         return f"worker-{str(uuid.uuid4()).replace('-', '')[:10]}"
 
     def _get_project_name(self) -> str:
-        try:
-            result = subprocess.run(['git', 'remote', 'get-url', 'origin'],
-                                    capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                url = result.stdout.strip()
-                if '/' in url:
-                    project = url.split('/')[-1].replace('.git', '')
-                    return project[:6] if len(project) > 6 else project
-        except:
-            pass
-        return "gvexwt"
+        return self.metadata.project
 
     def _get_version(self) -> str:
-        try:
-            result = subprocess.run(['git', 'describe', '--tags', '--abbrev=0'],
-                                    capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                return result.stdout.strip()
-            result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
-                                    capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                return f"git-{result.stdout.strip()}"
-        except:
-            pass
-        return "v1.0.0"
+        return self.metadata.version
 
     def _get_git_commit(self) -> str:
-        try:
-            result = subprocess.run(['git', 'rev-parse', 'HEAD'],
-                                    capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except:
-            pass
-        return "nogit" + str(int(time.time()))[:8]
+        return self.metadata.commit
 
     def _get_uptime(self):
-        try:
-            with open('/proc/uptime', 'r') as f:
-                uptime_seconds = float(f.readline().split()[0])
-                days = int(uptime_seconds // 86400)
-                hours = int((uptime_seconds % 86400) // 3600)
-                if days > 0:
-                    return f"{days} days, {hours} hours"
-                else:
-                    return f"{hours} hours"
-        except:
-            try:
-                boot_time = psutil.boot_time()
-                uptime_seconds = time.time() - boot_time
-                days = int(uptime_seconds // 86400)
-                hours = int((uptime_seconds % 86400) // 3600)
-                if days > 0:
-                    return f"{days} days, {hours} hours"
-                else:
-                    return f"{hours} hours"
-            except:
-                return "uptime unknown"
+        return self.metadata.uptime()
+
+    def _instrument(self, api_client):
+        if self.agent_stats is None:
+            return
+        record = self.agent_stats.record
+        if api_client is not None and hasattr(api_client, "observer"):
+            api_client.observer = lambda method, wall, cpu: record(f"rpc.{method}", wall, cpu)
 
     def get_system_health(self) -> Dict[str, Any]:
-        
         try:
-            mem = psutil.virtual_memory()
-            
-            
-            try:
-                disk_io = psutil.disk_io_counters()
-                diskrw = {"reads": disk_io.read_count, "writes": disk_io.write_count} if disk_io else {"reads": 0, "writes": 0}
-            except:
-                diskrw = {"reads": 0, "writes": 0}
-
-            
-            try:
-                if hasattr(os, 'getloadavg'):
-                    load_avg = os.getloadavg()
-                    load = {
-                        "min1": f"{load_avg[0]:.2f}",
-                        "min5": f"{load_avg[1]:.2f}",
-                        "min15": f"{load_avg[2]:.2f}",
-                        "uptime": self._get_uptime()
-                    }
-                else:
-                    cpu_count = psutil.cpu_count()
-                    cpu_percent = psutil.cpu_percent(interval=0.1)
-                    approx_load = (cpu_percent / 100.0) * cpu_count
-                    load = {
-                        "min1": f"{approx_load:.2f}",
-                        "min5": f"{approx_load:.2f}",
-                        "min15": f"{approx_load:.2f}",
-                        "uptime": self._get_uptime()
-                    }
-            except:
-                load = {"min1": "0.00", "min5": "0.00", "min15": "0.00", "uptime": "unknown"}
-
-            
-            try:
-                cpu_times = psutil.cpu_times_percent(interval=1.0)
-                cpu_stats = {
-                    "sy": round(cpu_times.system) if hasattr(cpu_times, 'system') else 0,
-                    "wa": round(cpu_times.iowait) if hasattr(cpu_times, 'iowait') else 0,
-                    "id": round(cpu_times.idle) if hasattr(cpu_times, 'idle') else 100,
-                    "us": round(cpu_times.user) if hasattr(cpu_times, 'user') else 0
-                }
-            except:
-                cpu_percent = psutil.cpu_percent(interval=1.0)
-                cpu_stats = {"sy": round(cpu_percent * 0.3), "wa": 0, "id": round(100 - cpu_percent), "us": round(cpu_percent * 0.7)}
-
-            
-            diskinfo = []
-            try:
-                partitions = psutil.disk_partitions()
-                for partition in partitions:
-                    try:
-                        disk_usage = psutil.disk_usage(partition.mountpoint)
-                        if disk_usage.total > 0:
-                            diskinfo.append({
-                                "total": disk_usage.total // 1024,
-                                "name": partition.mountpoint,
-                                "used": round((disk_usage.used / disk_usage.total) * 100, 2),
-                                "type": partition.fstype
-                            })
-                            break
-                    except (PermissionError, OSError):
-                        continue
-            except:
-                pass
-
-            if not diskinfo:
-                try:
-                    if os.name == 'nt':
-                        disk_usage = psutil.disk_usage('C:\\')
-                        diskinfo = [{
-                            "total": disk_usage.total // 1024,
-                            "name": "C:\\",
-                            "used": round((disk_usage.used / disk_usage.total) * 100, 2),
-                            "type": "NTFS"
-                        }]
-                except:
-                    diskinfo = [{"total": 0, "name": "/unknown", "used": 0.0, "type": "unknown"}]
-            try:
-                net_io = psutil.net_io_counters()
-                network = {"txbytes": net_io.bytes_sent // 1024, "rxbytes": net_io.bytes_recv // 1024} if net_io else {"txbytes": 0, "rxbytes": 0}
-            except:
-                network = {"txbytes": 0, "rxbytes": 0}
+            values = self.sampler.collect() if self.sampler else self.collectors.collect()
+        except Exception as e:
+            self.logger.error(f"Error collecting system health data: {e}")
+            return {}
+        return self._build_payload(values)
 
-            current_commit = self._get_git_commit()
+    def _build_payload(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            metadata = values["metadata"]
 
             payload = {
                 "jsonrpc": "2.0",
@@ -215,92 +232,237 @@ class HealthMonitor:
                     "service": self.service,
                     "stype": self.stype,
                     "running": self.running,
-                    "info": {"version": self.version, "commit": current_commit},
+                    "info": {"version": self.version, "commit": metadata["commit"]},
                     "logs": logs.flush_logs() or [
         {"ct": int(time.time() * 1000), "level": 20,
         "msg": f"Health data collected - Capture {self.capture_count + 1}"}
     ],
                     "cpu": {
-                        "diskrw": diskrw,
-                        "core": psutil.cpu_count(),
-                        "memory": {"total": mem.total // (1024 * 1024), "used": round(mem.percent)},
-                        "load": load,
-                        "cpu": cpu_stats,
-                        "diskinfo": diskinfo,
-                        "network": network
+                        "diskrw": values["diskrw"],
+                        "core": metadata["core"],
+                        "memory": values["memory"],
+                        "load": values["load"],
+                        "cpu": values["cpu"],
+                        "diskinfo": values["diskinfo"],
+                        "network": values["network"]
                     }
                 }
             }
+            if "processes" in values:
+                payload["params"]["cpu"]["processes"] = values["processes"]
+            if "cgroup" in values:
+                apply_cgroup(payload["params"]["cpu"], values["cgroup"], self.host.cgroup_mode)
+            if self.agent_stats is not None:
+                payload["params"]["self"] = self.agent_stats.summary()
+            if self.history is not None or self.alert_engine is not None or self.adaptive is not None:
+                metrics = flatten_metrics(payload["params"]["cpu"])
+                if self.adaptive is not None:
+                    payload["params"]["interval"] = self.adaptive.update(metrics)
+                if self.history is not None:
+                    self.history.record(metrics)
+                if self.alert_engine is not None:
+                    self._raise_alerts(self.alert_engine.evaluate(metrics))
             return payload
         except Exception as e:
             self.logger.error(f"Error collecting system health data: {e}")
             return {}
 
+    def _raise_alerts(self, transitions: List[Dict[str, Any]]):
+        for transition in transitions:
+            if transition["state"] == "firing":
+                self.logger.warning(transition["message"])
+            else:
+                self.logger.info(transition["message"])
+            if self.api_client and hasattr(self.api_client, "enqueue_notification"):
+                self.api_client.enqueue_notification(transition["message"], transition["tags"])
+
+    def _send(self, health_data: Dict[str, Any]) -> bool:
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            api_results = self.api_client.health_check_cycle(health_data)
+
+            if api_results.get('health_response'):
+                self.logger.info("Health data sent to API successfully")
+
+            if api_results.get('alert_response'):
+                self.logger.info("Alert data sent to API successfully")
+
+            if api_results.get('notify_response'):
+                self.logger.info("Notification data sent to API successfully")
+
+            health_response = api_results.get('health_response')
+            if self.spool:
+                if health_response:
+                    self.spool.replay(self.api_client.send_health_batch)
+                elif health_response is None or health_response.status_code >= 500 or health_response.status_code == 429:
+                    self.spool.append(health_data)
+            return bool(health_response)
+        except Exception as e:
+            self.logger.error(f"API communication failed: {e}")
+            self.logger.warning("Unable to send health data to API endpoint")
+            return False
+        finally:
+            if self.agent_stats is not None:
+                self.agent_stats.record("cycle.send", time.perf_counter() - started, time.thread_time() - cpu_started)
+
     def _monitoring_loop(self):
         self.logger.info(f"Starting health monitoring with {self.poll_interval}s interval")
-        while self.running:
+        while self.running and self.scheduler.wait():
             try:
+                if self.agent_stats is not None:
+                    self.agent_stats.begin_cycle()
+                started = time.perf_counter()
+                cpu_started = time.thread_time()
                 health_data = self.get_system_health()
-                if health_data:
-                    if self.api_client:
-                        try:
-                            
-                            api_results = self.api_client.health_check_cycle(health_data)
-                            
-                            
-                            if api_results.get('health_response'):
-                                self.logger.info("Health data sent to API successfully")
-
-                            if api_results.get('alert_response'):
-                                self.logger.info("Alert data sent to API successfully")
-
-                            if api_results.get('notify_response'):
-                                self.logger.info("Notification data sent to API successfully")
-
-                            
-                        except Exception as e:
-                            self.logger.error(f"API communication failed: {e}")
-                            self.logger.warning("Unable to send health data to API endpoint")
-                    else:
-                        print(json.dumps(health_data, indent=2))
-
-                    self.capture_count += 1
-                    self.logger.info(f"Health data collected (capture {self.capture_count})")
-
-                    if self.max_captures and self.capture_count >= self.max_captures:
-                        self.logger.info(f"Reached max captures ({self.max_captures}). Stopping monitor.")
-                        self.running = False
-                        break
-
-                time.sleep(self.poll_interval)
+                if self.agent_stats is not None:
+                    self.agent_stats.record("cycle.collect", time.perf_counter() - started, time.thread_time() - cpu_started)
+                if self.adaptive is not None:
+                    self.scheduler.set_interval(self.adaptive.interval)
+                more = self._dispatch(health_data)
+                if self.agent_stats is not None:
+                    self.agent_stats.end_cycle()
+                if not more:
+                    break
             except KeyboardInterrupt:
                 self.logger.info("Monitoring interrupted by user")
                 self.running = False
                 break
             except Exception as e:
                 self.logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(5)
+                self._stop_event.wait(5)
+
+        self._stop_sender()
+
+    def _dispatch(self, health_data: Dict[str, Any]) -> bool:
+        if not health_data:
+            return True
+        if self.metrics_endpoint:
+            self.metrics_endpoint.publish(health_data)
+        if self.sender:
+            if not self.sender.submit(health_data):
+                self.logger.warning("Send queue full - health data dropped")
+        elif self.api_client:
+            self._send(health_data)
+        else:
+            print(json.dumps(health_data, indent=2))
+
+        self.capture_count += 1
+        self.logger.info(f"Health data collected (capture {self.capture_count})")
+
+        if self.max_captures and self.capture_count >= self.max_captures:
+            self.logger.info(f"Reached max captures ({self.max_captures}). Stopping monitor.")
+            self.running = False
+            return False
+        return True
 
-    def start(self, interval: int = 10, output_file: str = "health_data.json", max_captures: Optional[int] = None):
+    def _on_shared_sample(self, values: Dict[str, Any]):
+        if not self.running:
+            return
+        try:
+            if not self._dispatch(self._build_payload(values)):
+                self.sampler.unregister(self)
+                # draining the last sends must not hold up the sampler
+                threading.Thread(target=self._finish_shared, daemon=True).start()
+        except Exception as e:
+            self.logger.error(f"Error in monitoring loop: {e}")
+
+    def _finish_shared(self):
+        self._stop_sender()
+        self._stop_event.set()
+
+    def _stop_sender(self):
+        sender, self.sender = self.sender, None
+        if sender:
+            sender.stop()
+        if self.spool:
+            self.spool.close()
+        follower, self.log_follower = self.log_follower, None
+        if follower:
+            follower.stop()
+        endpoint, self.metrics_endpoint = self.metrics_endpoint, None
+        if endpoint:
+            endpoint.stop()
+
+    def start(self,
+            interval: float = 10,
+            output_file: str = "health_data.json",
+            max_captures: Optional[int] = None,
+            async_send: bool = False,
+            queue_size: int = 100,
+            overflow: str = "drop_oldest",
+            senders: int = 1,
+            spool: bool = False,
+            system_logs: bool = False,
+            metrics_port: Optional[int] = None,
+            metrics_host: str = "127.0.0.1",
+            jitter: float = 0.0,
+            schedule: str = "skip",
+            adaptive: bool = False,
+            min_interval: float = 1.0,
+            max_interval: float = 60.0,
+            adaptive_thresholds: Optional[Dict[str, float]] = None):
         if self.running:
             self.logger.warning("Monitor is already running!")
             return
+        if self.lazy:
+            self._initialize()
 
-        self.poll_interval = interval
+        self.poll_interval = self.sampler.interval if self.sampler else interval
         self.output_file = output_file
         self.max_captures = max_captures
         self.capture_count = 0
+        self._stop_event.clear()
+        if not self.sampler:
+            self.scheduler = Scheduler(interval, jitter=jitter, policy=schedule, stop_event=self._stop_event)
+        # interval is where an adaptive monitor starts; it then moves between min_interval and max_interval
+        self.adaptive = (AdaptiveInterval(interval, floor=min_interval, ceiling=max_interval, thresholds=adaptive_thresholds)
+                         if adaptive and not self.sampler else None)
         self.running = True
 
-        self.logger.info(f"Starting health monitor - interval: {interval}s, output: {output_file}")
+        self.logger.info(f"Starting health monitor - interval: {self.poll_interval}s, output: {output_file}")
         if max_captures:
             self.logger.info(f"Will stop after {max_captures} captures")
+        if self.adaptive is not None:
+            self.logger.info(f"Adaptive sampling between {self.adaptive.floor}s and {self.adaptive.ceiling}s")
+        elif adaptive:
+            self.logger.warning("Adaptive sampling is not available on a shared sampler - using its schedule")
 
         if self.api_client:
             self.logger.info("API client configured - data will be sent to remote service")
         else:
             self.logger.info("No API client - running in local mode only")
 
+        if spool and not self.spool:
+            self.spool = Spool(os.path.splitext(output_file)[0] + ".spool")
+        if self.spool:
+            self.logger.info(f"Undelivered health data will be spooled to {self.spool.directory}")
+
+        if system_logs and not self.log_follower:
+            state_file = os.path.splitext(output_file)[0] + ".syslog-cursor"
+            self.log_follower = logs.follow_system_logs(state_file=state_file)
+
+        if metrics_port is not None and not self.metrics_endpoint:
+            from endpoint import MetricsEndpoint
+            try:
+                self.metrics_endpoint = MetricsEndpoint(metrics_host, metrics_port).start()
+                self.logger.info(f"Serving metrics on {self.metrics_endpoint.url}/metrics")
+            except OSError as e:
+                self.logger.error(f"Unable to start metrics endpoint on {metrics_host}:{metrics_port}: {e}")
+
+        # on a shared sampler sends always go through a queue, so network I/O never runs on the
+        # sampling thread and one slow endpoint cannot stall the other monitors
+        if (async_send or self.sampler) and self.api_client:
+            queue = PayloadQueue(maxsize=queue_size, overflow=overflow)
+            self.sender = SenderPool(self._send, queue, workers=senders).start()
+            self.logger.info(f"Sending in background - queue: {queue_size}, overflow: {overflow}, senders: {senders}")
+
+        if self.sampler:
+            # the shared sampler's schedule applies; interval, jitter and schedule are ignored
+            self.sampler.register(self)
+            self.logger.info("Attached to shared sampler")
+            return self
+
         self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self.monitor_thread.start()
         return self
@@ -312,14 +474,34 @@ class HealthMonitor:
 
         self.logger.info("Stopping health monitor...")
         self.running = False
+        self._stop_event.set()
+        if self.sampler:
+            self.sampler.unregister(self)
 
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=5)
 
+        self._stop_sender()
+
         self.logger.info(f"Health monitor stopped. Total captures: {self.capture_count}")
         return True
 
+    def close(self):
+        # stops the monitor and releases the collectors' file descriptors and threads; a monitor on
+        # a shared sampler leaves them to the sampler
+        if self.running:
+            self.stop()
+        if not self.sampler and self._host is not None:
+            self._host.close()
+
     def wait_for_completion(self):
+        if self.sampler and self.running:
+            try:
+                self._stop_event.wait()
+            except KeyboardInterrupt:
+                self.logger.info("Interrupted while waiting for completion")
+                self.stop()
+            return
         if self.monitor_thread and self.monitor_thread.is_alive():
             try:
                 self.monitor_thread.join()
@@ -339,10 +521,58 @@ class HealthMonitor:
     def is_running(self) -> bool:
         return self.running
 
+    def query(self, metric: str, window: Optional[float] = 300, stat: Optional[str] = None) -> Any:
+        if self.history is None:
+            return None
+        result = self.history.aggregate(metric, window)
+        return result.get(stat) if stat else result
+
+    def rollup(self, metric: str, bucket: float = 60, window: Optional[float] = 3600) -> List[Dict[str, float]]:
+        return self.history.rollup(metric, bucket, window) if self.history is not None else []
+
+    def get_summary(self, window: Optional[float] = 60) -> Dict[str, Dict[str, float]]:
+        return self.history.summary(window) if self.history is not None else {}
+
+    def get_sender_stats(self) -> Optional[Dict[str, Any]]:
+        return self.sender.stats() if self.sender else None
+
+    def get_agent_stats(self) -> Optional[Dict[str, Any]]:
+        return self.agent_stats.snapshot() if self.agent_stats is not None else None
+
+    def start_profile(self, cycles: int = 10, mode: str = "cprofile", top: int = 25):
+        if self.agent_stats is None:
+            self.logger.warning("Self statistics are disabled - profiling unavailable")
+            return
+        self.agent_stats.start_profile(cycles, mode, top)
+        self.logger.info(f"Profiling the next {cycles} cycles with {mode}")
+
+    def get_profile(self) -> Optional[Dict[str, Any]]:
+        return self.agent_stats.last_profile if self.agent_stats is not None else None
+
+    def get_transport_stats(self) -> Optional[Dict[str, Any]]:
+        if self.api_client and hasattr(self.api_client, "transport_stats"):
+            return self.api_client.transport_stats()
+        return None
+
+    def get_scheduler_stats(self) -> Optional[Dict[str, float]]:
+        scheduler = self.sampler.scheduler if self.sampler else self.scheduler
+        return scheduler.stats() if scheduler else None
+
+    def get_adaptive_stats(self) -> Optional[Dict[str, Any]]:
+        return self.adaptive.stats() if self.adaptive is not None else None
+
+    def get_endpoint_stats(self) -> Optional[Dict[str, int]]:
+        return self.metrics_endpoint.stats() if self.metrics_endpoint else None
+
     def set_api_client(self, api_client):
         self.api_client = api_client
+        self._instrument(api_client)
         self.logger.info("API client has been configured")
 
+    def set_spool(self, spool: Optional[Spool]):
+        self.spool = spool
+        self.logger.info("Spool has been configured" if spool else "Spool has been disabled")
+
 
 if __name__ == "__main__":
     import sys
@@ -352,7 +582,7 @@ if __name__ == "__main__":
 
     if len(sys.argv) > 1:
         try:
-            interval = int(sys.argv[1])
+            interval = float(sys.argv[1])
         except ValueError:
             print("Invalid interval. Using default 10 seconds.")
 
@@ -372,4 +602,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\nStopping monitor...")
         monitor.stop()
-        print("Monitor stopped.")
\ No newline at end of file
+        print("Monitor stopped.")
+    finally:
+        monitor.close()
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import re
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+PROC_FILES = {
+    "stat": "/proc/stat",
+    "meminfo": "/proc/meminfo",
+    "diskstats": "/proc/diskstats",
+    "netdev": "/proc/net/dev",
+    "mounts": "/proc/self/mounts",
+}
+# psutil reports disk bytes from 512-byte sectors regardless of the device block size
+SECTOR_SIZE = 512
+CPU_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal", "guest", "guest_nice")
+
+cputimes = namedtuple("cputimes", CPU_FIELDS)
+# same fields as psutil's partitions and disk usage, for the diskinfo collector
+partition = namedtuple("partition", ("device", "mountpoint", "fstype", "opts"))
+diskusage = namedtuple("diskusage", ("total", "used", "free"))
+# the mount table escapes space, tab, newline and backslash as octal
+_MOUNT_ESCAPE = re.compile(rb"\\([0-7]{3})")
+
+
+def _unescape(field: bytes) -> str:
+    return _MOUNT_ESCAPE.sub(lambda m: bytes([int(m.group(1), 8)]), field).decode("utf-8", "replace")
+
+
+def disk_usage(path: str) -> diskusage:
+    st = os.statvfs(path)
+    # like psutil: used counts blocks reserved for root, free is what an unprivileged user can write
+    return diskusage(st.f_blocks * st.f_frsize, (st.f_blocks - st.f_bfree) * st.f_frsize, st.f_bavail * st.f_frsize)
+
+
+class ProcFile:
+    def __init__(self, path: str, size: int = 16384):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        self.buffer = bytearray(size)
+
+    def read(self) -> bytes:
+        while True:
+            # procfs regenerates the contents on every read from offset 0
+            length = os.preadv(self.fd, [self.buffer], 0)
+            if length < len(self.buffer):
+                return bytes(memoryview(self.buffer)[:length])
+            self.buffer = bytearray(len(self.buffer) * 2)
+
+    def close(self):
+        fd, self.fd = self.fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def __del__(self):
+        # readers that are dropped without close() must not leak the descriptor
+        if getattr(self, "fd", None) is not None:
+            self.close()
+
+
+class ProcfsReader:
+    def __init__(self, files: Optional[Dict[str, str]] = None):
+        self.files: Dict[str, ProcFile] = {}
+        self._ticks = float(os.sysconf("SC_CLK_TCK"))
+        for name, path in (files or PROC_FILES).items():
+            try:
+                self.files[name] = ProcFile(path)
+            except OSError:
+                pass
+
+    def has(self, name: str) -> bool:
+        return name in self.files
+
+    def cpu_times(self, percpu: bool = False):
+        data = self.files["stat"].read()
+        cores = []
+        for line in data.split(b"\n"):
+            if not line.startswith(b"cpu"):
+                # the cpu lines come first; the large interrupt tables after them are skipped
+                break
+            fields = line.split()
+            values = [int(v) / self._ticks for v in fields[1:len(CPU_FIELDS) + 1]]
+            values += [0.0] * (len(CPU_FIELDS) - len(values))
+            if fields[0] == b"cpu":
+                if not percpu:
+                    return cputimes(*values)
+            else:
+                cores.append(cputimes(*values))
+        return cores
+
+    def memory(self) -> Dict[str, int]:
+        values = {}
+        for line in self.files["meminfo"].read().split(b"\n"):
+            if line.startswith((b"MemTotal:", b"MemAvailable:", b"MemFree:", b"Buffers:", b"Cached:")):
+                key, value = line.split(b":", 1)
+                values[key] = int(value.split()[0]) * 1024
+                if len(values) == 5:
+                    break
+        total = values[b"MemTotal"]
+        # kernels before 3.14 have no MemAvailable
+        available = values.get(b"MemAvailable", values.get(b"MemFree", 0) + values.get(b"Buffers", 0) + values.get(b"Cached", 0))
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+        return {"total": total // (1024 * 1024), "used": round(percent)}
+
+    def disk_counters(self) -> Dict[str, tuple]:
+        counters = {}
+        for line in self.files["diskstats"].read().split(b"\n"):
+            fields = line.split()
+            if len(fields) >= 14:
+                reads, rsectors, writes, wsectors = fields[3], fields[5], fields[7], fields[9]
+            elif len(fields) == 7:
+                # partitions on 2.6 kernels only report four counters
+                reads, rsectors, writes, wsectors = fields[3], fields[4], fields[5], fields[6]
+            else:
+                continue
+            counters[fields[2].decode()] = (int(reads), int(writes), int(rsectors) * SECTOR_SIZE, int(wsectors) * SECTOR_SIZE)
+        return counters
+
+    def net_counters(self) -> Dict[str, tuple]:
+        counters = {}
+        for line in self.files["netdev"].read().split(b"\n")[2:]:
+            colon = line.rfind(b":")
+            if colon < 0:
+                continue
+            f = line[colon + 1:].split()
+            # same order as NetworkIOCollector: sent/recv bytes, sent/recv packets, errors, drops
+            counters[line[:colon].strip().decode()] = (int(f[8]), int(f[0]), int(f[9]), int(f[1]),
+                                                       int(f[2]), int(f[10]), int(f[3]), int(f[11]))
+        return counters
+
+    def partitions(self) -> List[partition]:
+        partitions = []
+        for line in self.files["mounts"].read().split(b"\n"):
+            fields = line.split()
+            if len(fields) >= 4:
+                partitions.append(partition(*(_unescape(field) for field in fields[:4])))
+        return partitions
+
+    def close(self):
+        files, self.files = self.files, {}
+        for f in files.values():
+            f.close()
+
+
+def open_procfs() -> Optional[ProcfsReader]:
+    if not hasattr(os, "preadv") or not os.path.isdir("/proc"):
+        return None
+    reader = ProcfsReader()
+    if not reader.files:
+        return None
+    return reader
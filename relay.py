@@ -0,0 +1,258 @@
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from api import HealthAPIClient
+
+MAX_DATAGRAM = 65507
+
+
+class RelayAck:
+    def __init__(self, status_code: int, retry_after: float = 0.0):
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+def _bind_socket(unix_path: Optional[str], udp_addr: Optional[Tuple[str, int]]) -> socket.socket:
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(unix_path)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(udp_addr or ("127.0.0.1", 0))
+    return sock
+
+
+class RelayServer:
+    def __init__(self,
+                api_client: Optional[HealthAPIClient] = None,
+                unix_path: Optional[str] = None,
+                udp_addr: Optional[Tuple[str, int]] = None,
+                batch_size: int = 50,
+                flush_interval: float = 1.0,
+                max_pending: int = 1000):
+        self.api_client = api_client or HealthAPIClient(batch=True)
+        self.unix_path = unix_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.sock = _bind_socket(unix_path, udp_addr)
+        self.sock.settimeout(0.5)
+        self.pending = deque()
+        self.received = 0
+        self.forwarded = 0
+        self.rejected = 0
+        self.upstream_failures = 0
+        self.running = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def start(self):
+        self.running = True
+        for target, name in ((self._receive_loop, "relay-receive"), (self._flush_loop, "relay-flush")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"Relay listening on {self.address}")
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self.running = False
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        self.sock.close()
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
+
+    def _receive_loop(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                message = json.loads(data)
+                payload = message["payload"]
+            except (ValueError, KeyError, TypeError):
+                continue
+
+            with self._lock:
+                accepted = len(self.pending) < self.max_pending
+                if accepted:
+                    self.pending.append(payload)
+                    self.received += 1
+                else:
+                    self.rejected += 1
+                full_batch = len(self.pending) >= self.batch_size
+
+            if addr:
+                ack = {"id": message.get("id"), "ok": accepted}
+                if not accepted:
+                    ack["retry_after"] = self.flush_interval
+                try:
+                    self.sock.sendto(json.dumps(ack).encode('utf-8'), addr)
+                except OSError:
+                    pass
+            if full_batch:
+                self._wakeup.set()
+
+    def _flush_loop(self):
+        while self.running:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self) -> int:
+        forwarded = 0
+        while True:
+            with self._lock:
+                batch = [self.pending[i] for i in range(min(self.batch_size, len(self.pending)))]
+            if not batch:
+                return forwarded
+            # payloads already carry the agent's own service id, so they are passed through untouched
+            delivered = self.api_client.send_health_batch(batch, keep_service=True)
+            with self._lock:
+                for _ in range(delivered):
+                    self.pending.popleft()
+                self.forwarded += delivered
+            forwarded += delivered
+            if delivered < len(batch):
+                self.upstream_failures += 1
+                return forwarded
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self.pending),
+                "received": self.received,
+                "forwarded": self.forwarded,
+                "rejected": self.rejected,
+                "upstream_failures": self.upstream_failures
+            }
+
+
+class RelayClient:
+    def __init__(self,
+                unix_path: Optional[str] = None,
+                udp_addr: Optional[Tuple[str, int]] = None,
+                service_id: str = config.SERVICE_ID,
+                ack_timeout: float = 0.5):
+        if not unix_path and not udp_addr:
+            raise ValueError("RelayClient needs either unix_path or udp_addr")
+        self.service_id = service_id
+        self.ack_timeout = ack_timeout
+        if unix_path:
+            self.target: Any = unix_path
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            # autobind to an abstract address so the relay can answer
+            self.sock.bind("")
+        else:
+            self.target = udp_addr
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(ack_timeout)
+        self.retry_until = 0.0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending_notifications = deque(maxlen=100)
+
+    def _health_payload(self, health_payload: Dict[str, Any]) -> Dict[str, Any]:
+        if "params" in health_payload and isinstance(health_payload["params"], dict):
+            health_payload["params"]["service"] = self.service_id
+        return health_payload
+
+    def make_request(self, payload: Dict[str, Any]) -> Optional[RelayAck]:
+        if time.monotonic() < self.retry_until:
+            return RelayAck(503, self.retry_until - time.monotonic())
+        message_id = next(self._ids)
+        data = json.dumps({"id": message_id, "payload": payload}, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            try:
+                self.sock.sendto(data, self.target)
+                while True:
+                    reply = json.loads(self.sock.recv(4096))
+                    if reply.get("id") == message_id:
+                        break
+            except (OSError, ValueError):
+                return None
+        if reply.get("ok"):
+            return RelayAck(200)
+        retry_after = float(reply.get("retry_after", 1.0))
+        self.retry_until = time.monotonic() + retry_after
+        return RelayAck(503, retry_after)
+
+    def send_health_data(self, health_payload: Dict[str, Any]) -> Optional[RelayAck]:
+        return self.make_request(self._health_payload(health_payload))
+
+    def send_health_batch(self, health_payloads: List[Dict[str, Any]]) -> int:
+        delivered = 0
+        for payload in health_payloads:
+            if not self.send_health_data(payload):
+                break
+            delivered += 1
+        return delivered
+
+    def enqueue_notification(self, message: str, tags: Optional[list] = None):
+        self._pending_notifications.append({
+            "jsonrpc": "2.0",
+            "method": "service.notify",
+            "params": {
+                "service": self.service_id,
+                "msg": message,
+                "tags": tags or ["health", "monitoring"]
+            }
+        })
+
+    def health_check_cycle(self, health_data: Dict[str, Any]) -> Dict[str, Optional[RelayAck]]:
+        health_response = self.send_health_data(health_data)
+        while health_response and self._pending_notifications:
+            if not self.make_request(self._pending_notifications[0]):
+                break
+            self._pending_notifications.popleft()
+        return {
+            "health_response": health_response,
+            "alert_response": None,
+            "notify_response": None
+        }
+
+    def close(self):
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    path = sys.argv[1] if len(sys.argv) > 1 else "/tmp/atom-relay.sock"
+    relay = RelayServer(unix_path=path).start()
+    try:
+        while True:
+            time.sleep(5)
+    except KeyboardInterrupt:
+        relay.stop()
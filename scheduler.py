@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+SCHEDULE_POLICIES = ("skip", "catch_up")
+
+
+class Scheduler:
+    def __init__(self,
+                interval: float,
+                jitter: float = 0.0,
+                policy: str = "skip",
+                max_catch_up: int = 3,
+                stop_event: Optional[threading.Event] = None,
+                clock: Callable[[], float] = time.monotonic):
+        if policy not in SCHEDULE_POLICIES:
+            raise ValueError(f"Unknown schedule policy '{policy}', expected one of {SCHEDULE_POLICIES}")
+        if interval <= 0:
+            raise ValueError("Schedule interval must be positive")
+        self.interval = interval
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.policy = policy
+        self.max_catch_up = max(0, max_catch_up)
+        self.stop_event = stop_event or threading.Event()
+        self.clock = clock
+        self.ticks = 0
+        self.skipped = 0
+        self.caught_up = 0
+        self.max_lag = 0.0
+        self._next: Optional[float] = None
+
+    def wait(self) -> bool:
+        now = self.clock()
+        if self._next is None:
+            # a random phase inside the jitter window spreads a fleet started at the same
+            # moment; deadlines stay on a fixed lattice afterwards, so the rate is exact
+            self._next = now + random.uniform(0, self.jitter * self.interval)
+        else:
+            self._next += self.interval
+            late = now - self._next
+            if late >= self.interval:
+                missed = int(late // self.interval)
+                if self.policy == "catch_up":
+                    # run up to max_catch_up overdue ticks back to back, drop the rest
+                    dropped = max(0, missed - self.max_catch_up)
+                else:
+                    # run the most recent overdue tick now and forget the older ones
+                    dropped = missed
+                self._next += dropped * self.interval
+                self.skipped += dropped
+
+        delay = self._next - now
+        if delay > 0 and self.stop_event.wait(delay):
+            return False
+        if self.stop_event.is_set():
+            return False
+        lag = self.clock() - self._next
+        if lag >= self.interval:
+            self.caught_up += 1
+        self.max_lag = max(self.max_lag, lag)
+        self.ticks += 1
+        return True
+
+    def set_interval(self, interval: float):
+        # takes effect from the next deadline, which is measured from the last one
+        if interval <= 0:
+            raise ValueError("Schedule interval must be positive")
+        self.interval = interval
+
+    def stop(self):
+        self.stop_event.set()
+
+    def reset(self):
+        self.stop_event.clear()
+        self._next = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "caught_up": self.caught_up,
+            "max_lag": round(self.max_lag, 6)
+        }
@@ -0,0 +1,211 @@
+import bisect
+import gc
+import io
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from lazy import LazyModule
+
+psutil = LazyModule("psutil")
+# the profilers are only loaded when profiling is requested
+cProfile = LazyModule("cProfile")
+pstats = LazyModule("pstats")
+tracemalloc = LazyModule("tracemalloc")
+
+# upper bucket bounds in milliseconds
+LATENCY_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PROFILE_MODES = ("cprofile", "tracemalloc")
+# histogram name prefixes merged into one entry each in the per-cycle summary
+SUMMARY_GROUPS = ("collector", "rpc", "cycle.collect", "cycle.send")
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total_ms", "cpu_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.cpu_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, wall_ms: float, cpu_ms: float = 0.0):
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS_MS, wall_ms)] += 1
+        self.count += 1
+        self.total_ms += wall_ms
+        self.cpu_ms += cpu_ms
+        self.max_ms = max(self.max_ms, wall_ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.cpu_ms += other.cpu_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentiles(self, *pcts: float) -> List[float]:
+        if not self.count:
+            return [0.0] * len(pcts)
+        ranks = [pct / 100.0 * self.count for pct in pcts]
+        results = [self.max_ms] * len(pcts)
+        seen = 0
+        pending = 0
+        for i, count in enumerate(self.counts[:-1]):
+            seen += count
+            # report the bucket's upper bound, capped by the largest value seen
+            while pending < len(ranks) and seen >= ranks[pending]:
+                results[pending] = min(LATENCY_BOUNDS_MS[i], self.max_ms)
+                pending += 1
+            if pending == len(ranks):
+                break
+        return results
+
+    def to_dict(self) -> Dict[str, float]:
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        return {
+            "n": self.count,
+            "mean": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50": round(p50, 3),
+            "p95": round(p95, 3),
+            "p99": round(p99, 3),
+            "max": round(self.max_ms, 3),
+            "cpu": round(self.cpu_ms / self.count, 3) if self.count else 0.0
+        }
+
+
+class Profiler:
+    def __init__(self, cycles: int, mode: str = "cprofile", top: int = 25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+        self.cycles = max(1, cycles)
+        self.mode = mode
+        self.top = top
+        self.done = 0
+        self.result: Optional[str] = None
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._started_tracemalloc = False
+
+    def begin_cycle(self):
+        if self._profile is not None:
+            self._profile.enable()
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def end_cycle(self) -> bool:
+        if self._profile is not None:
+            self._profile.disable()
+        self.done += 1
+        if self.done < self.cycles:
+            return False
+        self.result = self._report()
+        return True
+
+    def _report(self) -> str:
+        out = io.StringIO()
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile, stream=out)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            return out.getvalue()
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            out.write(f"{stat}\n")
+        return out.getvalue()
+
+
+class AgentStats:
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.profiler: Optional[Profiler] = None
+        self.last_profile: Optional[Dict[str, Any]] = None
+        self._process = None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, wall: float, cpu: float = 0.0):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(wall * 1000, cpu * 1000)
+
+    def latencies(self, prefix: str = "") -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: h.to_dict() for name, h in self.histograms.items() if name.startswith(prefix)}
+
+    def _rss_threads(self) -> Tuple[int, int]:
+        # /proc/self/status has both, without importing psutil
+        try:
+            with open("/proc/self/status", "rb") as f:
+                fields = dict(line.split(b":", 1) for line in f if line.startswith((b"VmRSS:", b"Threads:")))
+            return int(fields[b"VmRSS"].split()[0]), int(fields[b"Threads"])
+        except (OSError, KeyError, ValueError):
+            pass
+        if self._process is None:
+            self._process = psutil.Process(os.getpid())
+        return self._process.memory_info().rss // 1024, self._process.num_threads()
+
+    def process(self) -> Dict[str, Any]:
+        rss, threads = self._rss_threads()
+        cpu = os.times()
+        gc_stats = gc.get_stats()
+        return {
+            "rss": rss,
+            "threads": threads,
+            "cpu_user": round(cpu.user, 3),
+            "cpu_system": round(cpu.system, 3),
+            "gc": {
+                "counts": list(gc.get_count()),
+                "collections": [s.get("collections", 0) for s in gc_stats],
+                "collected": sum(s.get("collected", 0) for s in gc_stats)
+            }
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = self.process()
+        stats["latency"] = self.latencies()
+        if self.profiler is not None:
+            stats["profiling"] = {"mode": self.profiler.mode, "done": self.profiler.done, "cycles": self.profiler.cycles}
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        # what every payload carries; the full histograms stay behind snapshot()
+        process = self.process()
+        stats: Dict[str, Any] = {name: process[name] for name in ("rss", "threads", "cpu_user", "cpu_system")}
+        groups: Dict[str, LatencyHistogram] = {}
+        with self._lock:
+            for name, histogram in self.histograms.items():
+                group = next((g for g in SUMMARY_GROUPS if name == g or name.startswith(g + ".")), None)
+                if group is not None:
+                    groups.setdefault(group, LatencyHistogram()).merge(histogram)
+        latency = {}
+        for group, histogram in groups.items():
+            p50, p95 = histogram.percentiles(50, 95)
+            latency[group] = {"n": histogram.count, "p50": round(p50, 3), "p95": round(p95, 3)}
+        stats["latency"] = latency
+        if self.profiler is not None:
+            stats["profiling"] = {"mode": self.profiler.mode, "done": self.profiler.done, "cycles": self.profiler.cycles}
+        return stats
+
+    def start_profile(self, cycles: int = 10, mode: str = "cprofile", top: int = 25):
+        self.profiler = Profiler(cycles, mode, top)
+
+    def stop_profile(self):
+        self.profiler = None
+
+    def begin_cycle(self):
+        if self.profiler is not None:
+            self.profiler.begin_cycle()
+
+    def end_cycle(self):
+        profiler = self.profiler
+        if profiler is not None and profiler.end_cycle():
+            self.last_profile = {"mode": profiler.mode, "cycles": profiler.done, "report": profiler.result}
+            self.profiler = None
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self.histograms)
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "block")
+
+
+def _coalesce(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    # the newer sample wins, but the log records of the replaced one are kept
+    old_logs = older.get("params", {}).get("logs") or []
+    params = newer.get("params")
+    if old_logs and isinstance(params, dict):
+        params["logs"] = old_logs + (params.get("logs") or [])
+    return newer
+
+
+class PayloadQueue:
+    def __init__(self, maxsize: int = 100, overflow: str = "drop_oldest", block_timeout: Optional[float] = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}")
+        self.maxsize = max(1, maxsize)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, payload: Dict[str, Any]) -> bool:
+        with self._cond:
+            if self.closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                if self.overflow == "drop_oldest":
+                    self._items.popleft()
+                    self.dropped += 1
+                elif self.overflow == "coalesce":
+                    self._items[-1] = _coalesce(self._items[-1], payload)
+                    self.coalesced += 1
+                    self._cond.notify()
+                    return True
+                else:
+                    deadline = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+                    while len(self._items) >= self.maxsize and not self.closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._cond.wait(remaining)
+                    if self.closed:
+                        return False
+            self._items.append(payload)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            payload = self._items.popleft()
+            self._cond.notify_all()
+            return payload
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class SenderPool:
+    def __init__(self,
+                send: Callable[[Dict[str, Any]], bool],
+                queue: Optional[PayloadQueue] = None,
+                workers: int = 1):
+        self.send = send
+        self.queue = queue if queue is not None else PayloadQueue()
+        self.workers = max(1, workers)
+        self.sent = 0
+        self.failed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._total_latency = 0.0
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"health-sender-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, payload: Dict[str, Any]) -> bool:
+        return self.queue.put(payload)
+
+    def _worker(self):
+        while True:
+            payload = self.queue.get(timeout=1.0)
+            if payload is None:
+                if self.queue.closed:
+                    return
+                continue
+            started = time.monotonic()
+            try:
+                ok = self.send(payload)
+            except Exception as e:
+                self.logger.error(f"Sender failed to ship payload: {e}")
+                ok = False
+            self._record(time.monotonic() - started, ok)
+
+    def _record(self, latency: float, ok: bool):
+        with self._stats_lock:
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+            self._total_latency += latency
+
+    def stop(self, timeout: float = 5.0):
+        self.queue.close()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            completed = self.sent + self.failed
+            return {
+                "depth": len(self.queue),
+                "dropped": self.queue.dropped,
+                "coalesced": self.queue.coalesced,
+                "sent": self.sent,
+                "failed": self.failed,
+                "latency": {
+                    "last": round(self.last_latency, 4),
+                    "avg": round(self._total_latency / completed, 4) if completed else 0.0,
+                    "max": round(self.max_latency, 4)
+                }
+            }
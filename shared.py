@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from collectors import HostCollectors
+from lazy import LazyModule
+from metadata import BuildMetadata
+from scheduler import Scheduler
+from selfstats import AgentStats
+
+requests = LazyModule("requests")
+
+
+class SharedSampler:
+    def __init__(self,
+                interval: float = 10,
+                per_core: bool = False,
+                intervals: Optional[Dict[str, float]] = None,
+                top_processes: int = 0,
+                disk_filters: Optional[Dict[str, Any]] = None,
+                jitter: float = 0.0,
+                schedule: str = "skip",
+                pool_size: int = 10,
+                self_stats: bool = True,
+                procfs: bool = False,
+                cgroup: str = "off"):
+        self.interval = interval
+        self.jitter = jitter
+        self.schedule = schedule
+        self.metadata = BuildMetadata()
+        self.host = HostCollectors(self.metadata, per_core=per_core, intervals=intervals,
+                                   top_processes=top_processes, disk_filters=disk_filters, procfs=procfs,
+                                   cgroup=cgroup)
+        self.collectors = self.host.registry
+        self.agent_stats = AgentStats() if self_stats else None
+        if self.agent_stats is not None:
+            record = self.agent_stats.record
+            self.collectors.observer = lambda name, wall, cpu: record(f"collector.{name}", wall, cpu)
+        # every monitor's API client posts through this one connection pool
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.ticks = 0
+        self.scheduler: Optional[Scheduler] = None
+        self._monitors: List[Any] = []
+        self._lock = threading.Lock()
+        self._collect_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(__name__)
+
+    def collect(self) -> Dict[str, Any]:
+        with self._collect_lock:
+            return self.host.collect()
+
+    def monitors(self) -> List[Any]:
+        with self._lock:
+            return list(self._monitors)
+
+    def register(self, monitor):
+        with self._lock:
+            if monitor not in self._monitors:
+                self._monitors.append(monitor)
+            if self._thread is None or not self._thread.is_alive() or self.scheduler.stop_event.is_set():
+                self._start()
+
+    def unregister(self, monitor):
+        with self._lock:
+            if monitor in self._monitors:
+                self._monitors.remove(monitor)
+            if not self._monitors:
+                self._stop()
+
+    def _start(self):
+        # each run gets its own stop event, so a thread that is still finishing its
+        # last tick cannot be revived by a later start
+        self.scheduler = Scheduler(self.interval, jitter=self.jitter, policy=self.schedule)
+        self._thread = threading.Thread(target=self._run, args=(self.scheduler,), name="shared-sampler", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Shared sampler started - interval: {self.interval}s")
+
+    def _stop(self):
+        if self.scheduler:
+            self.scheduler.stop()
+
+    def _run(self, scheduler: Scheduler):
+        while scheduler.wait():
+            try:
+                if self.agent_stats is not None:
+                    self.agent_stats.begin_cycle()
+                started = time.perf_counter()
+                cpu_started = time.thread_time()
+                values = self.collect()
+                if self.agent_stats is not None:
+                    self.agent_stats.record("cycle.collect", time.perf_counter() - started, time.thread_time() - cpu_started)
+                self.ticks += 1
+                for monitor in self.monitors():
+                    monitor._on_shared_sample(values)
+                if self.agent_stats is not None:
+                    self.agent_stats.end_cycle()
+            except Exception as e:
+                self.logger.error(f"Error in shared sampler: {e}")
+                scheduler.stop_event.wait(5)
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            self._monitors.clear()
+            self._stop()
+            thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+
+    def close(self):
+        self.stop()
+        self.host.close()
+        self.session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "monitors": len(self.monitors()),
+            "ticks": self.ticks,
+            "schedule": self.scheduler.stats() if self.scheduler else None
+        }
+
+
+_default: Optional[SharedSampler] = None
+_default_lock = threading.Lock()
+
+
+def shared_sampler(**kwargs) -> SharedSampler:
+    # the process-wide sampler; options only apply to the first call
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SharedSampler(**kwargs)
+        return _default
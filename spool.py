@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+SEGMENT_SUFFIX = ".seg"
+OFFSET_FILE = "replay.offset"
+
+
+class Spool:
+    def __init__(self,
+                directory: str,
+                max_bytes: int = 64 * 1024 * 1024,
+                max_age: float = 24 * 3600,
+                segment_bytes: int = 1024 * 1024,
+                replay_rate: float = 20.0,
+                replay_batch: int = 50):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.segment_bytes = segment_bytes
+        self.replay_rate = replay_rate
+        self.replay_batch = max(1, replay_batch)
+        self.spooled = 0
+        self.replayed = 0
+        self.expired_bytes = 0
+        self._writer = None
+        self._writer_path: Optional[str] = None
+        self._tokens = float(self.replay_batch)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(directory, exist_ok=True)
+        self._offset_segment, self._offset = self._load_offset()
+        self._enforce_limits()
+
+    def _segments(self) -> List[str]:
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+        except OSError:
+            return []
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _load_offset(self):
+        try:
+            with open(os.path.join(self.directory, OFFSET_FILE), 'r') as f:
+                name, offset = f.read().split()
+                return name, int(offset)
+        except (OSError, ValueError):
+            return None, 0
+
+    def _save_offset(self, segment: Optional[str], offset: int):
+        self._offset_segment, self._offset = segment, offset
+        path = os.path.join(self.directory, OFFSET_FILE)
+        try:
+            if segment is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            tmp = path + ".tmp"
+            with open(tmp, 'w') as f:
+                f.write(f"{segment} {offset}")
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.warning(f"Unable to persist spool replay offset: {e}")
+
+    def _open_segment(self):
+        self._writer_path = os.path.join(self.directory, f"{time.time_ns():020d}{SEGMENT_SUFFIX}")
+        self._writer = open(self._writer_path, 'ab', buffering=256 * 1024)
+
+    def _close_writer(self):
+        if self._writer:
+            self._writer.close()
+        self._writer = None
+        self._writer_path = None
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        if self._offset_segment == os.path.basename(path):
+            self._save_offset(None, 0)
+
+    def _enforce_limits(self):
+        segments = self._segments()
+        now = time.time()
+        sizes = {}
+        for path in segments:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if path != self._writer_path and now - st.st_mtime > self.max_age:
+                self.expired_bytes += st.st_size
+                self._remove(path)
+                continue
+            sizes[path] = st.st_size
+        total = sum(sizes.values())
+        for path in sorted(sizes):
+            if total <= self.max_bytes:
+                break
+            if path == self._writer_path:
+                self._close_writer()
+            self.expired_bytes += sizes[path]
+            total -= sizes[path]
+            self._remove(path)
+
+    def append(self, payload: Dict[str, Any]) -> bool:
+        try:
+            line = json.dumps(payload, separators=(',', ':')).encode('utf-8') + b"\n"
+        except (TypeError, ValueError):
+            return False
+        with self._lock:
+            try:
+                if self._writer is None:
+                    self._open_segment()
+                self._writer.write(line)
+                self._writer.flush()
+                self.spooled += 1
+                if self._writer.tell() >= self.segment_bytes:
+                    self._close_writer()
+                    self._enforce_limits()
+                return True
+            except OSError as e:
+                self.logger.error(f"Failed to spool payload: {e}")
+                self._close_writer()
+                return False
+
+    def has_pending(self) -> bool:
+        return bool(self._segments())
+
+    def pending_bytes(self) -> int:
+        total = 0
+        for path in self._segments():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return max(0, total - self._offset)
+
+    def _take_tokens(self) -> int:
+        now = time.monotonic()
+        burst = max(self.replay_rate, float(self.replay_batch))
+        self._tokens = min(burst, self._tokens + (now - self._last_refill) * self.replay_rate)
+        self._last_refill = now
+        return int(self._tokens)
+
+    def replay(self, send_batch: Callable[[List[Dict[str, Any]]], int]) -> int:
+        with self._lock:
+            budget = self._take_tokens()
+            if budget <= 0:
+                return 0
+            # seal the active segment so it can be read back
+            self._close_writer()
+            sent = 0
+            for path in self._segments():
+                if sent >= budget:
+                    break
+                name = os.path.basename(path)
+                offset = self._offset if name == self._offset_segment else 0
+                while sent < budget:
+                    payloads, ends = self._read(path, offset, min(self.replay_batch, budget - sent))
+                    if not payloads:
+                        self._remove(path)
+                        break
+                    delivered = send_batch(payloads)
+                    if delivered > 0:
+                        offset = ends[delivered - 1]
+                        self._save_offset(name, offset)
+                        sent += delivered
+                        self._tokens -= delivered
+                        self.replayed += delivered
+                    if delivered < len(payloads):
+                        return sent
+            if sent:
+                self.logger.info(f"Replayed {sent} spooled payloads")
+            return sent
+
+    def _read(self, path: str, offset: int, limit: int):
+        payloads, ends = [], []
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                while len(payloads) < limit:
+                    line = f.readline()
+                    if not line or not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    try:
+                        payloads.append(json.loads(line))
+                        ends.append(offset)
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return payloads, ends
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "segments": len(self._segments()),
+            "pending_bytes": self.pending_bytes(),
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "expired_bytes": self.expired_bytes
+        }
+
+    def close(self):
+        with self._lock:
+            self._close_writer()
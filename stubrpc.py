@@ -0,0 +1,103 @@
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+def _result_for(call: Dict[str, Any]) -> Dict[str, Any]:
+    if call.get("method") == "service.alerts":
+        return {"alerts": []}
+    return {"status": "ok"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubRPCServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            self._reply(400, {"jsonrpc": "2.0", "error": {"code": -32700, "message": "Parse error"}, "id": None})
+            return
+        self.server.record(body, length)
+
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        if self.server.error_rate > 0 and random.random() < self.server.error_rate:
+            self.server.errors += 1
+            self._reply(self.server.error_status, {"jsonrpc": "2.0", "error": {"code": -32000, "message": "Injected error"}, "id": None})
+            return
+
+        if isinstance(body, list):
+            if not self.server.accept_batches:
+                self._reply(200, {"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": None})
+                return
+            self._reply(200, [{"jsonrpc": "2.0", "id": call.get("id"), "result": _result_for(call)} for call in body])
+        else:
+            self._reply(200, {"jsonrpc": "2.0", "id": body.get("id"), "result": _result_for(body)})
+
+    def _reply(self, status: int, body: Any):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubRPCServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self,
+                host: str = "127.0.0.1",
+                port: int = 0,
+                accept_batches: bool = True,
+                latency: float = 0.0,
+                error_rate: float = 0.0,
+                error_status: int = 503):
+        super().__init__((host, port), _Handler)
+        self.accept_batches = accept_batches
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.errors = 0
+        self.requests: List[Any] = []
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/rpc"
+
+    def record(self, body: Any, length: int):
+        with self._lock:
+            self.requests.append(body)
+            self.bytes_received += length
+
+    def calls(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            calls = []
+            for body in self.requests:
+                calls.extend(body if isinstance(body, list) else [body])
+            return calls
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-rpc", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()